@@ -0,0 +1,225 @@
+"""Typsnitt och bilder som laddas lat och kommer ihåg sig mellan körningar.
+
+SysFont läser in hela systemets typsnittslista första gången den används
+(fc-list på Linux, registret på Windows). AssetCache sparar i stället vilken
+fil varje typsnitt löstes till i ett JSON-index i cachekatalogen, så att
+nästa start kan öppna filen direkt.
+
+Bilder skalas till storlekshinkar (bredd i steg om IMAGE_BUCKET_PX) och
+varje skalad variant sparas som BMP, så en ny start slipper avkoda och
+skala originalet och en serie fönsterändringar återanvänder samma variant.
+Finns ett manifest från tools/build_web.py bredvid bilden (webbygget)
+skalas i stället den minsta förskalade hinken som räcker, och originalet
+behöver inte ens finnas.
+
+Cachekatalogen är $TREFAS_CACHE_DIR eller en 3fas-katalog i användarens
+cachekatalog. Går den inte att skriva (t.ex. i webbläsaren) fungerar allt
+ändå, bara utan det sparade indexet.
+"""
+import json
+import os
+from collections import OrderedDict
+
+import pygame
+
+INDEX_VERSION = 1
+INDEX_FILE = "assets.json"
+IMAGE_BUCKET_PX = 16 # Width step of the cached image variants
+IMAGE_VARIANTS = 8 # Scaled images kept in memory
+FONT_OBJECTS = 64 # Font objects kept in memory
+PRESCALED_SUFFIX = ".buckets.json" # Manifest written by tools/build_web.py next to the image
+
+
+def default_cache_dir():
+    if os.environ.get("TREFAS_CACHE_DIR"):
+        return os.environ["TREFAS_CACHE_DIR"]
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "3fas")
+
+
+def make_font(path, size, bold=False, italic=False):
+    """Som SysFont när filen redan är känd (fet/kursiv syntetiseras vid behov)."""
+    font = pygame.font.Font(path, size)
+    if bold:
+        font.set_bold(True)
+    if italic:
+        font.set_italic(True)
+    return font
+
+
+class AssetCache:
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.index = self.load_index()
+        self.fonts = OrderedDict() # (name, size, bold, italic) -> Font
+        self.images = OrderedDict() # (path, width, height) -> Surface or None
+        self.sources = {} # path -> loaded original, only after a cache miss
+        self.manifests = {} # path -> prescaled bucket manifest or None
+
+    def load_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE)) as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "fonts": {}, "matches": {}, "images": {}}
+
+    def save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = os.path.join(self.cache_dir, INDEX_FILE + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.index, f, indent=1)
+            os.replace(tmp, os.path.join(self.cache_dir, INDEX_FILE))
+        except OSError:
+            pass # Read-only or missing home (e.g. in the browser); keep it in memory
+
+    # --- Typsnitt ---
+
+    def font_spec(self, name, bold, italic):
+        """(sökväg, syntetisk fet, syntetisk kursiv) som SysFont skulle välja."""
+        key = f"{name}|{int(bold)}|{int(italic)}"
+        spec = self.index["fonts"].get(key)
+        if spec is not None and (spec[0] is None or os.path.exists(spec[0])):
+            return spec
+        captured = []
+
+        def capture(path, size, set_bold, set_italic):
+            captured.append([path, set_bold, set_italic])
+            return None
+
+        pygame.font.SysFont(name, 1, bold, italic, constructor=capture)
+        spec = captured[0]
+        self.index["fonts"][key] = spec
+        self.save_index()
+        return spec
+
+    def font(self, name, size, bold=False, italic=False):
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if font is None:
+            path, set_bold, set_italic = self.font_spec(name, bold, italic)
+            font = make_font(path, size, set_bold, set_italic)
+            self.fonts[key] = font
+            if len(self.fonts) > FONT_OBJECTS:
+                self.fonts.popitem(last=False)
+        else:
+            self.fonts.move_to_end(key)
+        return font
+
+    def match_font(self, name):
+        """pygame.font.match_font med sparat resultat (None om typsnittet saknas)."""
+        matches = self.index["matches"]
+        if name in matches and (matches[name] is None or os.path.exists(matches[name])):
+            return matches[name]
+        matches[name] = pygame.font.match_font(name)
+        self.save_index()
+        return matches[name]
+
+    # --- Bilder ---
+
+    def source_key(self, path):
+        st = os.stat(path)
+        return f"{os.path.basename(path)}-{st.st_size}-{st.st_mtime_ns}"
+
+    def load_source(self, path):
+        if path not in self.sources:
+            self.sources[path] = pygame.image.load(path)
+        return self.sources[path]
+
+    def bucket_size(self, image_size, max_w, max_h):
+        """Största hinkstorleken med bildens proportioner som ryms i max_w x max_h."""
+        img_w, img_h = image_size
+        ratio = min(max_w / img_w, max_h / img_h)
+        width = int(img_w * ratio) // IMAGE_BUCKET_PX * IMAGE_BUCKET_PX
+        if width <= 0:
+            return None
+        return width, int(img_h * width / img_w)
+
+    def scaled_image(self, path, max_w, max_h):
+        """Bilden i path skalad för att rymmas i max_w x max_h, eller None."""
+        key = (path, max_w, max_h)
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+        try:
+            image = self.load_scaled(path, max_w, max_h)
+        except (OSError, pygame.error) as e:
+            print(f"Kunde inte ladda bild: {e}")
+            image = None
+        self.images[key] = image
+        if len(self.images) > IMAGE_VARIANTS:
+            self.images.popitem(last=False)
+        return image
+
+    def prescaled(self, path):
+        """Manifestet över förskalade hinkar för path, eller None."""
+        if path not in self.manifests:
+            manifest = None
+            try:
+                with open(os.path.splitext(path)[0] + PRESCALED_SUFFIX) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                pass
+            self.manifests[path] = manifest
+        return self.manifests[path]
+
+    def memory_variant(self, path, size):
+        # Same bucket as a variant in memory: reuse it
+        for (p, _, _), image in self.images.items():
+            if p == path and image is not None and image.get_size() == size:
+                return image
+        return None
+
+    def load_prescaled(self, path, manifest, max_w, max_h):
+        size = self.bucket_size(manifest["size"], max_w, max_h)
+        if size is None:
+            return None
+        image = self.memory_variant(path, size)
+        if image is not None:
+            return image
+        # Smallest bucket at least as wide as the target, else the largest
+        buckets = sorted(manifest["buckets"])
+        _, _, name = next((b for b in buckets if b[0] >= size[0]), buckets[-1])
+        image = pygame.image.load(os.path.join(os.path.dirname(path), name))
+        if image.get_size() != size:
+            image = pygame.transform.scale(image, size)
+        return image
+
+    def load_scaled(self, path, max_w, max_h):
+        manifest = self.prescaled(path)
+        if manifest is not None:
+            return self.load_prescaled(path, manifest, max_w, max_h)
+        source = self.source_key(path)
+        info = self.index["images"].get(source)
+        if info is None:
+            info = {"size": list(self.load_source(path).get_size()), "variants": []}
+            # Variants of an older version of the file are stale
+            self.index["images"] = {k: v for k, v in self.index["images"].items()
+                                    if not k.startswith(os.path.basename(path) + "-")}
+            self.index["images"][source] = info
+            self.save_index()
+        size = self.bucket_size(info["size"], max_w, max_h)
+        if size is None:
+            return None
+        image = self.memory_variant(path, size)
+        if image is not None:
+            return image
+        variant = os.path.join(self.cache_dir, f"{source}-{size[0]}x{size[1]}.bmp")
+        if list(size) in info["variants"] and os.path.exists(variant):
+            try:
+                return pygame.image.load(variant)
+            except pygame.error:
+                pass
+        image = pygame.transform.scale(self.load_source(path), size)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pygame.image.save(image, variant)
+            info["variants"].append(list(size))
+            self.save_index()
+        except (OSError, pygame.error):
+            pass
+        return image
@@ -0,0 +1,77 @@
+"""Scenarier/s för /calculate (ett anrop per scenario) mot /calculate_batch.
+
+Körs mot Flasks testklient, så siffrorna mäter servern utan nätverk.
+
+    python benchmarks/bench_calculate_batch.py [--scenarios N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flask_app"))
+
+from app import app, calculate_currents  # noqa: E402
+
+
+def scenarios(n, seed=1):
+    rng = random.Random(seed)
+    p_y = [[rng.randrange(0, 2001, 10) for _ in range(3)] for _ in range(n)]
+    p_delta = [[rng.randrange(0, 3001, 10) for _ in range(3)] for _ in range(n)]
+    return p_y, p_delta
+
+
+def bench_single(client, p_y, p_delta):
+    start = time.perf_counter()
+    for y, d in zip(p_y, p_delta):
+        client.post('/calculate', json={'p_y': y, 'p_delta': d}).get_json()
+    return len(p_y) / (time.perf_counter() - start)
+
+
+def bench_batch_json(client, p_y, p_delta):
+    start = time.perf_counter()
+    client.post('/calculate_batch', json={'p_y': p_y, 'p_delta': p_delta}).get_json()
+    return len(p_y) / (time.perf_counter() - start)
+
+
+def bench_batch_binary(client, p_y, p_delta):
+    body = np.hstack([np.array(p_y), np.array(p_delta)]).astype('<f4').tobytes()
+    start = time.perf_counter()
+    resp = client.post('/calculate_batch', data=body, content_type='application/octet-stream')
+    np.frombuffer(resp.data, dtype='<f4')
+    return len(p_y) / (time.perf_counter() - start)
+
+
+def check_parity(client, p_y, p_delta):
+    resp = client.post('/calculate_batch', json={'p_y': p_y, 'p_delta': p_delta}).get_json()
+    for i, (y, d) in enumerate(zip(p_y, p_delta)):
+        ref = calculate_currents(y, d)
+        for a, b in zip(ref['line_currents'] + [ref['neutral_current']],
+                        resp['line_currents'][i] + [resp['neutral_current'][i]]):
+            assert abs(a['magnitude'] - b['magnitude']) < 1e-9, (y, d)
+            if a['magnitude'] > 1e-9:
+                assert abs(a['angle'] - b['angle']) < 1e-9, (y, d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", type=int, default=2000)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    p_y, p_delta = scenarios(args.scenarios)
+    check_parity(client, p_y[:200], p_delta[:200])
+
+    single = bench_single(client, p_y, p_delta)
+    print(f"{'/calculate':>24} {single:>14,.0f} scenarios/s")
+    for name, func in [("/calculate_batch json", bench_batch_json),
+                       ("/calculate_batch f32", bench_batch_binary)]:
+        rate = func(client, p_y, p_delta)
+        print(f"{name:>24} {rate:>14,.0f} scenarios/s {rate / single:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
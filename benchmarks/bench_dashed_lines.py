@@ -0,0 +1,124 @@
+"""Mikrobenchmark för de streckade linjerna i visardiagrammet.
+
+Jämför de ursprungliga per-streck-looparna med draw_dashed_line (cachat
+streckmönster) och draw_horizontal_dashed_line (en blit ur en förritad
+remsa), och räknar hur många pixlar som skiljer.
+
+    python benchmarks/bench_dashed_lines.py [--frames N]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame  # noqa: E402
+
+import main as sim_main  # noqa: E402
+
+RESOLUTIONS = [(1200, 800), (3840, 2160)]
+
+
+def reference_dashed_line(sim, surface, color, start, end, width=1):
+    scaled_width = max(1, int(width * sim.scale))
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    dist = math.hypot(dx, dy)
+    angle = math.atan2(dy, dx)
+    dash_len = int(5 * sim.scale)
+    gap_len = int(5 * sim.scale)
+    curr_dist = 0
+    while curr_dist < dist:
+        p_start = (start[0] + math.cos(angle) * curr_dist, start[1] + math.sin(angle) * curr_dist)
+        p_end = (start[0] + math.cos(angle) * min(curr_dist + dash_len, dist),
+                 start[1] + math.sin(angle) * min(curr_dist + dash_len, dist))
+        pygame.draw.line(surface, color, p_start, p_end, scaled_width)
+        curr_dist += dash_len + gap_len
+
+
+def reference_horizontal_dashed_line(sim, surface, color, start_x, end_x, y, width=1):
+    if end_x < start_x:
+        start_x, end_x = end_x, start_x
+    dash_len = int(4 * sim.scale)
+    gap_len = int(4 * sim.scale)
+    scaled_width = max(1, int(width * sim.scale))
+    curr_x = start_x
+    while curr_x < end_x:
+        next_x = min(curr_x + dash_len, end_x)
+        pygame.draw.line(surface, color, (curr_x, y), (next_x, y), scaled_width)
+        curr_x += dash_len + gap_len
+
+
+def frame_lines(sim, t):
+    """The three reference phasors and three projection lines of one frame."""
+    cx, cy = sim.w // 4, int(sim.h * 0.75)
+    axis_len = int(100 * sim.scale)
+    sine_axis_x = sim.w // 2 + int(80 * sim.scale)
+    radial, horizontal = [], []
+    for i in range(3):
+        theta = t - math.radians(120 * i)
+        radial.append(((cx, cy), (cx + axis_len * math.cos(theta), cy - axis_len * math.sin(theta))))
+        mag = 80 * sim.scale
+        horizontal.append((cx + mag * math.cos(theta + 0.3), sine_axis_x, cy - mag * math.sin(theta + 0.3)))
+    return radial, horizontal
+
+
+def draw_reference(sim, surface, lines):
+    radial, horizontal = lines
+    for start, end in radial:
+        reference_dashed_line(sim, surface, sim_main.COLOR_N, start, end)
+    for start_x, end_x, y in horizontal:
+        reference_horizontal_dashed_line(sim, surface, sim_main.COLOR_L1, start_x, end_x, y)
+
+
+def draw_new(sim, surface, lines):
+    radial, horizontal = lines
+    for start, end in radial:
+        sim.draw_dashed_line(surface, sim_main.COLOR_N, start, end)
+    for start_x, end_x, y in horizontal:
+        sim.draw_horizontal_dashed_line(surface, sim_main.COLOR_L1, start_x, end_x, y)
+
+
+def pixel_diff(a, b):
+    pa, pb = pygame.PixelArray(a), pygame.PixelArray(b)
+    w, h = a.get_size()
+    diff = sum(1 for x in range(w) for y in range(h) if pa[x, y] != pb[x, y])
+    del pa, pb
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+    if args.frames < 1:
+        parser.error("--frames must be at least 1")
+
+    sim_main.init_headless()
+    print(f"{'resolution':>10} {'variant':>10} {'us/frame':>10} {'speedup':>8}")
+    for w, h in RESOLUTIONS:
+        sim = sim_main.ThreePhaseSim(w, h)
+        surface = pygame.Surface((w, h))
+        frames = [frame_lines(sim, k * 0.05) for k in range(args.frames)]
+        base = None
+        for name, draw in [("reference", draw_reference), ("batched", draw_new)]:
+            start = time.perf_counter()
+            for lines in frames:
+                draw(sim, surface, lines)
+            per_frame = (time.perf_counter() - start) / len(frames) * 1e6
+            base = base or per_frame
+            print(f"{f'{w}x{h}':>10} {name:>10} {per_frame:>10.1f} {base / per_frame:>7.1f}x")
+
+        if w * h <= 1200 * 800:
+            ref, new = pygame.Surface((w, h)), pygame.Surface((w, h))
+            lines = frames[min(7, len(frames) - 1)]
+            draw_reference(sim, ref, lines)
+            draw_new(sim, new, lines)
+            print(f"{'':>10} differing pixels in one frame: {pixel_diff(ref, new)}")
+
+
+if __name__ == "__main__":
+    main()
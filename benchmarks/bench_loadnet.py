@@ -0,0 +1,76 @@
+"""Skalning av lastnätslösaren från några få till många laster.
+
+För varje antal laster mäts uppbyggnad (add_loads), lösning med N ansluten
+och med flytande stjärnpunkt, samt samma lösning utan numpy och en naiv
+referens som räknar strömmen last för last.
+
+    python benchmarks/bench_loadnet.py [--loads 10 100 1000 10000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import loadnet  # noqa: E402
+
+
+def build(n, rng):
+    net = loadnet.LoadNetwork()
+    for connection in (loadnet.Y, loadnet.DELTA):
+        phases = [rng.randrange(3) for _ in range(n // 2)]
+        powers = [rng.uniform(10, 3000) for _ in phases]
+        pfs = [rng.choice((1.0, 0.95, 0.8, -0.9)) for _ in phases]
+        net.add_loads(connection, phases, powers, pfs)
+    return net
+
+
+def naive_solve(net):
+    """Ström per last och summering i Python, utan aggregerade admittanser."""
+    e = [net.voltage_rms * u for u in loadnet.U_PHASE]
+    line = [0j, 0j, 0j]
+    for is_delta, k, adm in zip(net.is_delta, net.phases, net.admittances):
+        if is_delta:
+            i = adm * (e[k] - e[(k + 1) % 3])
+            line[k] += i
+            line[(k + 1) % 3] -= i
+        else:
+            line[k] += adm * e[k]
+    return line
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loads", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    numpy_module = loadnet.np
+    print(f"{'loads':>7} {'build ms':>9} {'solve ms':>9} {'floating':>9} {'no numpy':>9} {'naive ms':>9} {'max diff A':>11}")
+    for n in args.loads:
+        build_ms, net = timed(lambda: build(n, rng), 1)
+        solve_ms, solution = timed(net.solve, args.repeat)
+        floating_ms, _ = timed(lambda: net.solve(neutral_connected=False), args.repeat)
+        loadnet.np = None
+        try:
+            plain_ms, _ = timed(net.solve, args.repeat)
+        finally:
+            loadnet.np = numpy_module
+        naive_ms, naive = timed(lambda: naive_solve(net), args.repeat)
+        diff = max(abs(a - b) for a, b in zip(solution.line_currents, naive))
+        print(f"{n:>7,} {build_ms:>9.2f} {solve_ms:>9.3f} {floating_ms:>9.3f} {plain_ms:>9.3f} "
+              f"{naive_ms:>9.3f} {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Filstorlek och uppslagningstid för driftpunktstabellen mot live-beräkning.
+
+    python benchmarks/bench_lut.py [--step 500] [--lookups N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "flask_app"))
+
+import oplut  # noqa: E402
+from app import calculate_currents  # noqa: E402
+
+
+def timed(func, points):
+    start = time.perf_counter()
+    for p_y, p_delta in points:
+        func(p_y, p_delta)
+    return (time.perf_counter() - start) / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--step", type=float, nargs="+", default=[500.0, 250.0])
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'step W':>7} {'points':>12} {'file MB':>9} {'build s':>8} {'open ms':>8} "
+          f"{'lookup us':>10} {'live us':>8}")
+    rng = random.Random(1)
+    for step in args.step:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.lut")
+            start = time.perf_counter()
+            count = oplut.write_table(path, y_step=step, delta_step=step)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            table = oplut.OperatingPointTable(path)
+            open_ms = (time.perf_counter() - start) * 1000
+
+            y_grid = [step * k for k in range(table.n_y)]
+            d_grid = [step * k for k in range(table.n_d)]
+            points = [([rng.choice(y_grid) for _ in range(3)], [rng.choice(d_grid) for _ in range(3)])
+                      for _ in range(args.lookups)]
+            lookup = timed(table.lookup, points) * 1e6
+            live = timed(calculate_currents, points) * 1e6
+            print(f"{step:>7.0f} {count:>12,} {table.file_size() / 1e6:>9.1f} {build:>8.2f} {open_ms:>8.2f} "
+                  f"{lookup:>10.2f} {live:>8.2f}")
+            del table
+
+
+if __name__ == "__main__":
+    main()
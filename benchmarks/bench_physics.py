@@ -0,0 +1,80 @@
+"""Anrop/s för fysikkärnans ingångar mot den tidigare dict-versionen.
+
+"legacy dict" är den gamla calculate_currents i flask_app/app.py, som
+byggde visarna vid varje anrop och returnerade nästlade dicts.
+
+    python benchmarks/bench_physics.py [--calls N]
+"""
+import argparse
+import cmath
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import physics  # noqa: E402
+
+
+def legacy_calculate_currents(p_y_values, p_delta_values):
+    u_phase = [cmath.rect(1, 0), cmath.rect(1, -2 * math.pi / 3), cmath.rect(1, -4 * math.pi / 3)]
+    u_line = [cmath.rect(1, math.pi / 6), cmath.rect(1, -math.pi / 2), cmath.rect(1, -7 * math.pi / 6)]
+    i_y = []
+    for i in range(3):
+        p = p_y_values[i]
+        if p < 0: p = 0
+        i_y.append(p / physics.VOLTAGE_RMS * u_phase[i])
+    u_line_rms = physics.VOLTAGE_RMS * math.sqrt(3)
+    i_d = []
+    for i in range(3):
+        p = p_delta_values[i]
+        if p < 0: p = 0
+        i_d.append(p / u_line_rms * u_line[i])
+    i_total = [i_y[0] + i_d[0] - i_d[2], i_y[1] + i_d[1] - i_d[0], i_y[2] + i_d[2] - i_d[1]]
+    line_currents_data = [{'magnitude': abs(i), 'angle': cmath.phase(i)} for i in i_total]
+    i_n = i_total[0] + i_total[1] + i_total[2]
+    return {'line_currents': line_currents_data,
+            'neutral_current': {'magnitude': abs(i_n), 'angle': cmath.phase(i_n)}}
+
+
+def calls_per_second(func, cases):
+    start = time.perf_counter()
+    for p_y, p_delta in cases:
+        func(p_y, p_delta)
+    return len(cases) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    cases = [(tuple(rng.randrange(0, 2001, 10) for _ in range(3)),
+              tuple(rng.randrange(0, 3001, 10) for _ in range(3))) for _ in range(args.calls)]
+    # Slider-like traffic: few distinct operating points, repeated
+    repeated = [cases[rng.randrange(1000)] for _ in range(args.calls)]
+
+    rows = [
+        ("legacy dict", calls_per_second(legacy_calculate_currents, cases)),
+        ("physics.currents", calls_per_second(physics.currents, cases)),
+        ("as_dict(currents)", calls_per_second(lambda y, d: physics.as_dict(physics.currents(y, d)), cases)),
+        ("currents_cached (repeated)", calls_per_second(physics.currents_cached, repeated)),
+    ]
+    p_y = [c[0] for c in cases]
+    p_delta = [c[1] for c in cases]
+    start = time.perf_counter()
+    physics.currents_batch(p_y, p_delta)
+    batch = len(cases) / (time.perf_counter() - start)
+    rows.append(("currents_batch" + ("" if physics.np is not None else " (no numpy)"), batch))
+
+    base = rows[0][1]
+    print(f"{'entry point':<28} {'calls/s':>12} {'speedup':>8}")
+    for name, rate in rows:
+        print(f"{name:<28} {rate:>12,.0f} {rate / base:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Bildtid per metod för ThreePhaseSim, renderat headless (SDL dummy).
+
+Kör update och de fyra draw_*-metoderna i N bilder för varje upplösning
+och belastning, och skriver medel/p95 i ms per metod som JSON.
+
+    python benchmarks/bench_render.py [--frames 200] [--output result.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame  # noqa: E402
+
+import main as sim_main  # noqa: E402
+
+RESOLUTIONS = [(800, 600), (1200, 800), (1920, 1080), (3840, 2160)]
+# (p_y1, p_y2, p_y3, p_delta12, p_delta23, p_delta31)
+LOADS = {
+    "idle": (0, 0, 0, 0, 0, 0),
+    "balanced": (1000, 1000, 1000, 1500, 1500, 1500),
+    "unbalanced": (2000, 300, 0, 3000, 0, 1200),
+}
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def bench(width, height, loads, frames):
+    surface = pygame.Surface((width, height))
+    sim = sim_main.ThreePhaseSim(width, height)
+    for s, p in zip(sim.sliders_y + sim.sliders_delta, loads):
+        s.val = p
+
+    calls = [
+        ("update", lambda: sim.update([])),
+        ("draw_circuit_section", lambda: sim.draw_circuit_section(surface)),
+        ("draw_controls_section", lambda: sim.draw_controls_section(surface)),
+        ("draw_phasor_diagram", lambda: sim.draw_phasor_diagram(surface)),
+        ("draw_sine_waves", lambda: sim.draw_sine_waves(surface)),
+    ]
+    times = {name: [] for name, _ in calls}
+    frame_times = []
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        surface.fill(sim_main.COLOR_BG)
+        for name, call in calls:
+            start = time.perf_counter()
+            call()
+            times[name].append((time.perf_counter() - start) * 1000)
+        frame_times.append((time.perf_counter() - frame_start) * 1000)
+    times["frame"] = frame_times
+
+    # The same frames through the layered renderer used by main()
+    renderer = sim_main.LayeredRenderer(sim)
+    layered_times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        sim.update([])
+        renderer.render(surface)
+        layered_times.append((time.perf_counter() - start) * 1000)
+    times["layered_frame"] = layered_times
+
+    return {name: {"mean_ms": statistics.fmean(t), "p95_ms": percentile(t, 0.95)} for name, t in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    sim_main.init_headless()
+    results = []
+    for width, height in RESOLUTIONS:
+        for load_name, loads in LOADS.items():
+            results.append({
+                "resolution": f"{width}x{height}",
+                "load": load_name,
+                "methods": bench(width, height, loads, args.frames),
+            })
+            methods = results[-1]["methods"]
+            print(f"{f'{width}x{height}':>9} {load_name:>10}: frame mean {methods['frame']['mean_ms']:.2f} ms, "
+                  f"p95 {methods['frame']['p95_ms']:.2f} ms, layered mean "
+                  f"{methods['layered_frame']['mean_ms']:.2f} ms", file=sys.stderr)
+
+    report = {
+        "frames": args.frames,
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy": sim_main.np is not None,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Koder/s och uppslagningar/s för secret_code_generator.
+
+Jämför generate_secret_code dag för dag med generate_codes (förhashat
+saltprefix), och verifiering genom att prova datum ett i taget med
+uppslagning i det omvända indexet (byggt, läst från disk och i minnet).
+
+    python benchmarks/bench_secret_codes.py [--days 3650] [--lookups 2000]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import secret_code_generator as scg  # noqa: E402
+
+
+def rate(count, func):
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def scan_verify(code, start, days):
+    # The old way: try dates one by one
+    for k in range(days):
+        date_str = (start + datetime.timedelta(days=k)).strftime("%Y-%m-%d")
+        if scg.generate_secret_code(date_str=date_str) == code:
+            return date_str
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=3650, help="window size in days")
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = datetime.date(2020, 1, 1)
+    end = start + datetime.timedelta(days=args.days - 1)
+    long_salt = "x" * 80 # Spans a full SHA-256 block, so the batch copies the hashed prefix
+
+    def one_by_one(salt):
+        day = start
+        for _ in range(args.days):
+            scg.generate_secret_code(salt, day.strftime("%Y-%m-%d"))
+            day += datetime.timedelta(days=1)
+
+    print(f"{'operation':<44} {'per second':>14}")
+    for label, salt in (("", scg.DEFAULT_SALT), (", 80-char salt", long_salt)):
+        print(f"{'generate_secret_code per day' + label:<44} {rate(args.days, lambda: one_by_one(salt)):>14,.0f}")
+        print(f"{'generate_codes' + label:<44} {rate(args.days, lambda: list(scg.generate_codes(start, end, salt))):>14,.0f}")
+
+    rng = random.Random(1)
+    codes = [code for _, code in scg.generate_codes(start, end)]
+    queries = [rng.choice(codes) if rng.random() < 0.9 else "0000000000" for _ in range(args.lookups)]
+    scans = queries[:max(1, args.lookups // 100)]
+    print(f"{'verify by scanning dates':<44} {rate(len(scans), lambda: [scan_verify(q, start, args.days) for q in scans]):>14,.1f}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start_time = time.perf_counter()
+        index = scg.code_index(start, end, cache_dir=cache_dir)
+        build_ms = (time.perf_counter() - start_time) * 1000
+        scg.code_index.cache_clear()
+        start_time = time.perf_counter()
+        scg.code_index(start, end, cache_dir=cache_dir)
+        load_ms = (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        scg.code_index(start, end, cache_dir=cache_dir)
+        memory_ms = (time.perf_counter() - start_time) * 1000
+    print(f"{'verify via index lookup':<44} {rate(len(queries), lambda: [index.lookup(q) for q in queries]):>14,.0f}")
+    print(f"index over {args.days} days: build {build_ms:.2f} ms, from disk {load_ms:.2f} ms, "
+          f"from memory {memory_ms:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
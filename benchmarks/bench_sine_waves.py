@@ -0,0 +1,92 @@
+"""Jämför punkter/s för sinuskurvorna i draw_sine_waves, före och efter.
+
+    python benchmarks/bench_sine_waves.py [--frames N]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pygame  # noqa: E402
+
+import main as sim  # noqa: E402
+
+RESOLUTIONS = [(1200, 800), (3840, 2160)]
+PHASORS = [(56.5, 0.0), (87.0, -2.094), (87.0, 2.094), (30.4, -3.1416)]
+
+
+def reference_traces(phasors, t, offset_x, offset_y, width, step):
+    # The original per-point loop from draw_sine_waves
+    points_lists = [[], [], [], []]
+    for x in range(0, width, step):
+        t_offset = x * 0.05
+        for i in range(4):
+            mag_px, angle_rad = phasors[i]
+            y_val = mag_px * math.sin(t + t_offset + angle_rad)
+            points_lists[i].append((offset_x + x, offset_y - y_val))
+    return points_lists
+
+
+def layout(w, h):
+    scale = min(w / 1200, h / 800)
+    offset_x = w // 2 + int(80 * scale)
+    offset_y = int(h * 0.75)
+    width = w // 2 - int(120 * scale)
+    step = max(2, int(2 * scale))
+    phasors = [(m * scale, a) for m, a in PHASORS]
+    return phasors, offset_x, offset_y, width, step
+
+
+def run(func, frames, w, h, surface=None):
+    phasors, offset_x, offset_y, width, step = layout(w, h)
+    n_points = 0
+    start = time.perf_counter()
+    for frame in range(frames):
+        traces = func(phasors, frame * 0.016, offset_x, offset_y, width, step)
+        n_points += sum(len(tr) for tr in traces)
+        if surface is not None:
+            for tr in traces:
+                pygame.draw.lines(surface, sim.COLOR_N, False, tr, 2)
+    return n_points / (time.perf_counter() - start)
+
+
+def max_deviation(func, w, h):
+    phasors, offset_x, offset_y, width, step = layout(w, h)
+    ref = reference_traces(phasors, 1.234, offset_x, offset_y, width, step)
+    new = func(phasors, 1.234, offset_x, offset_y, width, step)
+    return max(abs(p[1] - q[1]) for tr_ref, tr_new in zip(ref, new) for p, q in zip(tr_ref, tr_new))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    numpy_mod = sim.np
+    variants = [("reference", reference_traces)]
+    if numpy_mod is not None:
+        variants.append(("numpy", sim.sine_traces))
+    variants.append(("lut", sim.sine_traces))
+
+    print(f"{'resolution':>10} {'variant':>10} {'points/s':>14} {'speedup':>8} "
+          f"{'+draw/s':>14} {'speedup':>8} {'max dev px':>10}")
+    for w, h in RESOLUTIONS:
+        surface = pygame.Surface((w, h))
+        base = base_draw = None
+        for name, func in variants:
+            sim.np = None if name == "lut" else numpy_mod
+            rate = run(func, args.frames, w, h)
+            rate_draw = run(func, args.frames, w, h, surface)
+            base = base or rate
+            base_draw = base_draw or rate_draw
+            print(f"{f'{w}x{h}':>10} {name:>10} {rate:>14,.0f} {rate / base:>7.1f}x "
+                  f"{rate_draw:>14,.0f} {rate_draw / base_draw:>7.1f}x {max_deviation(func, w, h):>10.3f}")
+    sim.np = numpy_mod
+
+
+if __name__ == "__main__":
+    main()
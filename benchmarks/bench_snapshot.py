@@ -0,0 +1,67 @@
+"""Latens för /snapshot: kall rendering mot cacheträff från disk och minne.
+
+Körs mot Flasks testklient med en tom, tillfällig cachekatalog.
+"cold" är nya belastningar (rendering + PNG-kodning + skrivning till
+disk), "disk" samma förfrågningar efter att minnescachen tömts, och
+"memory" en upprepning till. Första förfrågan (pygame-start) redovisas
+för sig.
+
+    python benchmarks/bench_snapshot.py [--requests 50] [--sizes 800x600 1920x1080]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def timed_get(client, url):
+    start = time.perf_counter()
+    response = client.get(url)
+    elapsed = (time.perf_counter() - start) * 1000
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--sizes", nargs="+", default=["800x600", "1920x1080"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["SNAPSHOT_CACHE_DIR"] = cache_dir
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flask_app"))
+        import app
+
+        client = app.app.test_client()
+        first = timed_get(client, "/snapshot?w=320&h=240")
+        print(f"first request (pygame start + render): {first:.1f} ms")
+        print(f"{'size':>10} {'level':>7} {'p50 ms':>8} {'p95 ms':>8} {'KB':>7}")
+        rng = random.Random(1)
+        for size in args.sizes:
+            w, h = size.split("x")
+            urls = [f"/snapshot?w={w}&h={h}&t={rng.randrange(0, 628) / 100}"
+                    f"&p_y={rng.randrange(0, 2001, 10)},{rng.randrange(0, 2001, 10)},{rng.randrange(0, 2001, 10)}"
+                    f"&p_delta={rng.randrange(0, 3001, 10)},{rng.randrange(0, 3001, 10)},{rng.randrange(0, 3001, 10)}"
+                    for _ in range(args.requests)]
+            kbytes = len(client.get(urls[0]).data) / 1024 # Also warms this size's pool slot
+            levels = [("cold", [timed_get(client, u) for u in urls[1:]])]
+            app.snapshot_cache.clear_memory()
+            levels.append(("disk", [timed_get(client, u) for u in urls[1:]]))
+            levels.append(("memory", [timed_get(client, u) for u in urls[1:]]))
+            for level, times in levels:
+                print(f"{size:>10} {level:>7} {percentile(times, 0.5):>8.2f} {percentile(times, 0.95):>8.2f} "
+                      f"{kbytes:>7.1f}")
+        print(f"cache: {app.snapshot_cache.stats}, renders: {app.snapshot_renderer.renders}")
+
+
+if __name__ == "__main__":
+    main()
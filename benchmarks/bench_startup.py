@@ -0,0 +1,97 @@
+"""Tid till första bild och kostnad per fönsterändring, i nya processer.
+
+Varje körning startar en ny Python-process (SDL dummy) som importerar
+main, skapar ThreePhaseSim och ritar första bilden, och sedan kör en
+serie bilder med en VIDEORESIZE-händelse var. "cold" använder en tom
+cachekatalog varje gång, "warm" en katalog från en tidigare körning.
+
+    python benchmarks/bench_startup.py [--runs 5] [--root ANNAN_CHECKOUT]
+
+Med --root kan en äldre checkout mätas för före/efter-jämförelse.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+root = sys.argv[1]
+sys.path.insert(0, root)
+os.chdir(root)
+import pygame
+t_pygame = time.perf_counter()
+import main
+t_import = time.perf_counter()
+screen = main.init_headless(1200, 800)
+t_init = time.perf_counter()
+sim = main.ThreePhaseSim(1200, 800)
+t_sim = time.perf_counter()
+renderer = main.LayeredRenderer(sim)
+sim.update([])
+renderer.render(screen)
+t_frame = time.perf_counter()
+
+storm = int(sys.argv[2])
+start = time.perf_counter()
+for i in range(storm):
+    w, h = 1000 + 7 * i, 700 + 5 * i
+    screen = pygame.Surface((w, h))
+    sim.update([pygame.event.Event(pygame.VIDEORESIZE, w=w, h=h, size=(w, h))])
+    renderer.invalidate()
+    renderer.render(screen)
+t_storm = time.perf_counter()
+print(json.dumps({
+    "import_pygame": (t_pygame - t0) * 1000,
+    "import_main": (t_import - t_pygame) * 1000,
+    "init": (t_init - t_import) * 1000,
+    "sim": (t_sim - t_init) * 1000,
+    "first_frame": (t_frame - t_sim) * 1000,
+    "ttff": (t_frame - t0) * 1000,
+    "resize_frame": (t_storm - start) * 1000 / storm,
+}))
+"""
+FIELDS = ("import_pygame", "import_main", "init", "sim", "first_frame", "ttff", "resize_frame")
+
+
+def run(root, cache_dir, storm):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", TREFAS_CACHE_DIR=cache_dir)
+    proc = subprocess.run([sys.executable, "-c", CHILD, root, str(storm)], env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="checkout to measure")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--storm", type=int, default=50, help="resize events after the first frame")
+    args = parser.parse_args()
+    root = os.path.abspath(args.root)
+
+    print(f"{'cache':>6} " + " ".join(f"{f:>13}" for f in FIELDS) + "   (ms, median)")
+    with tempfile.TemporaryDirectory() as warm_dir:
+        run(root, warm_dir, 1) # Fill the warm cache
+        for label in ("cold", "warm"):
+            results = []
+            for _ in range(args.runs):
+                if label == "cold":
+                    with tempfile.TemporaryDirectory() as cold_dir:
+                        results.append(run(root, cold_dir, args.storm))
+                else:
+                    results.append(run(root, warm_dir, args.storm))
+            print(f"{label:>6} " + " ".join(f"{median([r[f] for r in results]):>13.2f}" for f in FIELDS))
+
+
+if __name__ == "__main__":
+    main()
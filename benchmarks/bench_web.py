@@ -0,0 +1,103 @@
+"""Storlek och starttid för webbygget (tools/build_web.py).
+
+Bygger till en tillfällig katalog och redovisar:
+
+- apk-storleken mot samma kod med 3fas.jpg i full storlek och mot den
+  utlagda 3fas.apk, samt sidans storlek med platshållarbilden;
+- tid till första bild i nya Python-processer (SDL dummy, tom cache som i
+  webbläsaren) för repots katalog och för den uppackade apk:n, alltså
+  kostnaden för att avkoda och skala bilden;
+- i en lokal headless-webbläsare (Playwright + Chromium, om installerat):
+  första målning (platshållaren) och tid tills main.py ritat sin första
+  bild (window.trefasInteractive). Sidan hämtar pygbag-körmiljön från
+  CDN:en, så det kräver nätverk.
+
+    python benchmarks/bench_web.py [--runs 5] [--timeout 120]
+"""
+import argparse
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "tools"))
+
+import bench_startup  # noqa: E402
+import build_web  # noqa: E402
+
+FIELDS = ("sim", "first_frame", "ttff")
+
+
+def native_startup(root, runs):
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            results.append(bench_startup.run(root, cache_dir, 1))
+    return {f: bench_startup.median([r[f] for r in results]) for f in FIELDS}
+
+
+def browser_timings(web_dir, timeout):
+    """(första målning ms, första bild ms, överförda byte), eller en sträng om det inte går att mäta."""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return "playwright is not installed (pip install playwright && playwright install chromium)"
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=web_dir)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.goto(f"http://127.0.0.1:{server.server_port}/index.html")
+            page.wait_for_function("window.trefasInteractive !== undefined", timeout=timeout * 1000)
+            paint = page.evaluate("(performance.getEntriesByName('first-contentful-paint')[0] || {}).startTime")
+            ready = page.evaluate("window.trefasInteractive")
+            transferred = page.evaluate(
+                "performance.getEntriesByType('resource').reduce((sum, e) => sum + e.transferSize, 0)")
+            browser.close()
+        return paint, ready, transferred
+    except Exception as e: # Browser missing, no network for the CDN, timeout
+        return f"{type(e).__name__}: {e}"
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the first frame in the browser")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        web_dir = os.path.join(tmp, "web")
+        report = build_web.build(web_dir, os.path.join(build_web.ROOT, "index.html"))
+        print(f"3fas.apk {report['apk_bytes'] / 1024:.1f} KB "
+              f"(with full {build_web.IMAGE}: {report['full_image_apk_bytes'] / 1024:.1f} KB, "
+              f"deployed: {(report['deployed_apk_bytes'] or 0) / 1024:.1f} KB), "
+              f"index.html {report['page_bytes'] / 1024:.1f} KB incl. {report['poster_bytes'] / 1024:.1f} KB poster")
+
+        bundle_root = os.path.join(tmp, "bundle")
+        with zipfile.ZipFile(os.path.join(web_dir, "3fas.apk")) as apk:
+            apk.extractall(bundle_root)
+        print(f"\n{'native, cold cache':<20} " + " ".join(f"{f:>12}" for f in FIELDS) + "   (ms, median)")
+        for label, root in (("repo (3fas.jpg)", build_web.ROOT), ("web bundle", os.path.join(bundle_root, "assets"))):
+            timings = native_startup(root, args.runs)
+            print(f"{label:<20} " + " ".join(f"{timings[f]:>12.2f}" for f in FIELDS))
+
+        result = browser_timings(web_dir, args.timeout)
+        if isinstance(result, str):
+            print(f"\nbrowser: not measured - {result}")
+        else:
+            paint, ready, transferred = result
+            paint = "?" if paint is None else f"{paint:.0f}"
+            print(f"\nbrowser: first paint {paint} ms, first frame (interactive) {ready:.0f} ms, "
+                  f"{transferred / 1024:.0f} KB transferred")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Lokalt lasttest av serverlägena i flask_app/serve.py.
+
+Startar servern i varje läge, kör --clients samtidiga klienter som var och
+en återanvänder sin anslutning (keep-alive) och POST:ar /calculate under
+--duration sekunder, och skriver p50/p99-latens och anrop/s. I asgi-läget
+mäts även WebSocket-kanalen /ws om paketet websockets finns.
+
+    python benchmarks/load_test.py [--modes dev prefork asgi] [--clients 16] [--duration 5]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SERVE_PY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flask_app", "serve.py")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def random_body(rng):
+    return json.dumps({"p_y": [rng.randrange(0, 2001, 10) for _ in range(3)],
+                       "p_delta": [rng.randrange(0, 3001, 10) for _ in range(3)]})
+
+
+def http_client(port, stop_at, latencies, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Content-Type": "application/json"}
+    while time.perf_counter() < stop_at:
+        body = random_body(rng)
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/calculate", body, headers)
+            conn.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_http(port, clients, duration):
+    latencies = []
+    stop_at = time.perf_counter() + duration
+    threads = [threading.Thread(target=http_client, args=(port, stop_at, latencies, i)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def run_websocket(port, clients, duration):
+    import websockets
+
+    latencies = []
+
+    async def client(seed, stop_at):
+        rng = random.Random(seed)
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                await ws.send(random_body(rng))
+                await ws.recv()
+                latencies.append(time.perf_counter() - start)
+
+    async def run_all():
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(*(client(i, stop_at) for i in range(clients)))
+
+    asyncio.run(run_all())
+    return latencies
+
+
+def report(name, latencies, duration):
+    if not latencies:
+        print(f"{name:>14} no successful requests")
+        return
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{name:>14} {len(latencies) / duration:>10,.0f} {p50:>9.2f} {p99:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["dev", "prefork", "asgi"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'mode':>14} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode in args.modes:
+        port = free_port()
+        cmd = [sys.executable, SERVE_PY, "--mode", mode, "--port", str(port), "--workers", str(args.workers)]
+        if mode == "dev":
+            cmd.append("--no-debug")
+        server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_for_server(port):
+                print(f"{mode:>14} server did not start (missing optional dependency?)")
+                continue
+            report(mode, run_http(port, args.clients, args.duration), args.duration)
+            if mode == "asgi":
+                try:
+                    report("asgi websocket", run_websocket(port, args.clients, args.duration), args.duration)
+                except ImportError:
+                    print(f"{'asgi websocket':>14} skipped (pip install websockets)")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,105 @@
-from flask import Flask, render_template, request, jsonify
-import cmath
+from flask import Flask, render_template, request, jsonify, Response
+import functools
+import json
 import math
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError: # The batch endpoint falls back to the scalar function
+    np = None
+
+# Shared modules live next to main.py
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+import oplut
+import physics
+import simstream
+from snapshot import (FORMATS, SnapshotCache, SnapshotRenderer, SnapshotUnavailable,
+                      key_digest, snapshot_key)
 
 # By AI agent Mima 2026-02-05 18:35:00: Flask application for 3-phase simulation
 app = Flask(__name__)
 
-# --- Physics Parameters (extracted from original main.py) ---
-VOLTAGE_RMS = 230.0 # By AI agent Mima 2026-02-05 18:35:00
+# Precomputed operating points (tools/build_lut.py), if present
+op_table = oplut.OperatingPointTable.open(os.path.join(ROOT_DIR, oplut.DEFAULT_PATH))
+
+# --- Physics Parameters (shared with main.py, see physics.py) ---
+VOLTAGE_RMS = physics.VOLTAGE_RMS
 
 # By AI agent Mima 2026-02-05 18:35:00: Adapted calculate_currents function
 def calculate_currents(p_y_values, p_delta_values):
-    # Base voltage phasors for Y-connection (L1, L2, L3 relative to Neutral)
-    # These are unit vectors representing the phase angles
-    u_phase = [
-        cmath.rect(1, 0),                        # L1: 0 degrees
-        cmath.rect(1, -2 * math.pi / 3),         # L2: -120 degrees
-        cmath.rect(1, -4 * math.pi / 3)          # L3: -240 degrees (or +120 degrees)
-    ]
-    
-    # Base voltage phasors for Delta-connection (Line-to-Line)
-    # These are unit vectors representing the phase angles of line voltages
-    u_line = [
-        cmath.rect(1, math.pi / 6),              # U12: 30 degrees (L1-L2)
-        cmath.rect(1, -math.pi / 2),             # U23: -90 degrees (L2-L3)
-        cmath.rect(1, -7 * math.pi / 6)          # U31: -210 degrees (L3-L1)
-    ]
-    
-    # Calculate currents for Y-connected loads
-    i_y = []
-    for i in range(3):
-        p = p_y_values[i]
-        if p < 0: p = 0 # Ensure power is non-negative
-        mag = p / VOLTAGE_RMS if VOLTAGE_RMS != 0 else 0
-        i_y.append(mag * u_phase[i])
-            
-    # Calculate line-to-line RMS voltage for Delta connection
-    u_line_rms = VOLTAGE_RMS * math.sqrt(3)
-    
-    # Calculate currents for Delta-connected loads
-    i_d = []
-    for i in range(3):
-        p = p_delta_values[i]
-        if p < 0: p = 0 # Ensure power is non-negative
-        mag = p / u_line_rms if u_line_rms != 0 else 0
-        i_d.append(mag * u_line[i])
-        
-    # Calculate total line currents (Kirchhoff's current law at the nodes)
-    # iL1 = iY1 + iD1 - iD3 (current from L1 to L2, minus current from L3 to L1)
-    # iL2 = iY2 + iD2 - iD1
-    # iL3 = iY3 + iD3 - iD2
-    i_total = [
-        i_y[0] + i_d[0] - i_d[2],
-        i_y[1] + i_d[1] - i_d[0],
-        i_y[2] + i_d[2] - i_d[1]
-    ]
-    
-    line_currents_data = []
-    for i_ph in i_total:
-        mag = abs(i_ph)
-        angle = cmath.phase(i_ph)
-        line_currents_data.append({'magnitude': mag, 'angle': angle})
-            
-    # Calculate neutral current (sum of all line currents)
-    i_n_vec = (i_total[0] + i_total[1] + i_total[2])
-    neutral_current_data = {'magnitude': abs(i_n_vec), 'angle': cmath.phase(i_n_vec)}
-
-    return {
-        'line_currents': line_currents_data,
-        'neutral_current': neutral_current_data
-    }
+    return physics.as_dict(physics.currents(p_y_values, p_delta_values))
+
+# --- Response cache for /calculate ---
+# Sliders snap to 10 W, so requests on that grid are served from a cache
+# of serialized responses. Other powers are computed exactly and not cached.
+POWER_STEP = 10.0
+RESPONSE_CACHE_SIZE = 4096
+CACHE_CONTROL = 'public, max-age=86400'
+not_modified_count = 0
+
+def quantize_powers(p_y_values, p_delta_values):
+    """Six-tuple of powers rounded to POWER_STEP, used as cache key."""
+    return tuple(round(float(p) / POWER_STEP) * POWER_STEP for p in list(p_y_values) + list(p_delta_values))
+
+@functools.lru_cache(maxsize=RESPONSE_CACHE_SIZE)
+def cached_response_body(key):
+    row = op_table.lookup(key[:3], key[3:]) if op_table else None
+    if row is None:
+        row = physics.currents(key[:3], key[3:])
+    return json.dumps(physics.as_dict(row))
+
+def etag_for(key):
+    return 'p' + '-'.join(str(int(p)) for p in key)
+
+def three_values(values):
+    """True for a list of three values (JSON list or split query string), before float conversion."""
+    return isinstance(values, (list, tuple)) and len(values) == 3
+
+def parse_powers(p_y_values, p_delta_values):
+    """(powers, grid key) as six-tuples of floats; raises TypeError/ValueError/OverflowError."""
+    powers = tuple(float(p) for p in list(p_y_values) + list(p_delta_values))
+    return powers, quantize_powers(powers[:3], powers[3:])
+
+def currents_response(powers, key):
+    """(JSON body, ETag) for /calculate: cached on the grid, exact and uncached off it."""
+    if powers == key:
+        return cached_response_body(key), etag_for(key)
+    body = json.dumps(physics.as_dict(physics.currents(powers[:3], powers[3:])))
+    return body, 'x' + '-'.join(repr(p) for p in powers)
+
+# Batch version of calculate_currents: one row per load scenario
+BATCH_FIELDS = 6 # p_y1, p_y2, p_y3, p_delta1, p_delta2, p_delta3
+BATCH_RESULT_FIELDS = physics.RESULT_FIELDS # (magnitude, angle) for L1, L2, L3 and N
+MAX_BATCH_SIZE = 1_000_000
+
+def calculate_currents_batch(p_y_values, p_delta_values):
+    """Vectorized calculate_currents for N scenarios.
+
+    p_y_values and p_delta_values have shape (N, 3). Returns an (N, 8) float
+    array with magnitude and angle for L1, L2, L3 and N per row.
+    """
+    return physics.currents_batch(p_y_values, p_delta_values)
+
+def batch_rows(values):
+    """JSON scenario list as float rows of three finite powers; ValueError/TypeError otherwise."""
+    if np is not None:
+        rows = np.asarray(values, dtype=np.float64)
+        if rows.size == 0:
+            rows = rows.reshape(0, 3)
+        if rows.ndim != 2 or rows.shape[1] != 3:
+            raise ValueError('rows must have three values')
+        if not np.isfinite(rows).all():
+            raise ValueError('powers must be finite')
+        return rows
+    rows = [[float(p) for p in row] for row in values]
+    if any(len(row) != 3 for row in rows):
+        raise ValueError('rows must have three values')
+    if not all(math.isfinite(p) for row in rows for p in row):
+        raise ValueError('powers must be finite')
+    return rows
 
 # By AI agent Mima 2026-02-05 18:35:00: Main route to render the HTML template
 @app.route('/')
@@ -76,14 +107,168 @@ def index():
     return render_template('index.html')
 
 # By AI agent Mima 2026-02-05 18:35:00: API endpoint for current calculation
-@app.route('/calculate', methods=['POST'])
+# GET takes comma-separated query parameters (?p_y=1,2,3&p_delta=4,5,6) so
+# the response can also be cached by browsers and proxies.
+@app.route('/calculate', methods=['GET', 'POST'])
 def get_currents():
+    global not_modified_count
+    if request.method == 'GET':
+        p_y_values = request.args.get('p_y', '0,0,0').split(',')
+        p_delta_values = request.args.get('p_delta', '0,0,0').split(',')
+    else:
+        data = request.json
+        p_y_values = data.get('p_y', [0.0, 0.0, 0.0])
+        p_delta_values = data.get('p_delta', [0.0, 0.0, 0.0])
+    if not (three_values(p_y_values) and three_values(p_delta_values)):
+        return jsonify({'error': 'p_y and p_delta need three values each'}), 400
+    try:
+        powers, key = parse_powers(p_y_values, p_delta_values)
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({'error': 'powers must be numbers'}), 400
+
+    body, etag = currents_response(powers, key)
+    if etag in request.if_none_match:
+        not_modified_count += 1
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+# Hit-rate statistics for the /calculate response cache
+@app.route('/stats')
+def get_stats():
+    info = cached_response_body.cache_info()
+    lookups = info.hits + info.misses
+    return jsonify({
+        'calculate_cache': {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hit_rate': info.hits / lookups if lookups else 0.0,
+            'not_modified': not_modified_count,
+        },
+        'operating_point_table': {
+            'hits': op_table.hits,
+            'misses': op_table.misses,
+            'points': op_table.count,
+        } if op_table else None,
+        'snapshots': dict(snapshot_cache.stats, renders=snapshot_renderer.renders),
+    })
+
+# API endpoint for many scenarios in one request.
+# JSON: {"p_y": [[..3..], ...], "p_delta": [[..3..], ...]} -> JSON arrays.
+# application/octet-stream: little-endian float32 rows of 6 powers
+# (p_y1..3, p_delta1..3) -> float32 rows of 8 values (magnitude, angle
+# for L1, L2, L3, N).
+@app.route('/calculate_batch', methods=['POST'])
+def get_currents_batch():
+    binary = request.mimetype == 'application/octet-stream'
+    if binary:
+        if np is None:
+            return jsonify({'error': 'binary batches require numpy'}), 415
+        body = request.get_data()
+        if len(body) % (4 * BATCH_FIELDS):
+            return jsonify({'error': f'body must be float32 rows of {BATCH_FIELDS} values'}), 400
+        rows = np.frombuffer(body, dtype='<f4').reshape(-1, BATCH_FIELDS)
+        if not np.isfinite(rows).all():
+            return jsonify({'error': 'powers must be finite'}), 400
+        p_y_values, p_delta_values = rows[:, :3], rows[:, 3:]
+    else:
+        data = request.json
+        try:
+            p_y_values = batch_rows(data.get('p_y', []))
+            p_delta_values = batch_rows(data.get('p_delta', []))
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return jsonify({'error': 'p_y and p_delta must be lists of [p1, p2, p3] finite numbers'}), 400
+        if len(p_y_values) != len(p_delta_values):
+            return jsonify({'error': 'p_y and p_delta must have the same length'}), 400
+
+    if len(p_y_values) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'at most {MAX_BATCH_SIZE} scenarios per batch'}), 413
+
+    results = calculate_currents_batch(p_y_values, p_delta_values)
+    if binary:
+        return Response(results.astype('<f4').tobytes(), mimetype='application/octet-stream')
+
+    if np is not None:
+        results = results.tolist()
+    return jsonify({
+        'line_currents': [[{'magnitude': r[2 * i], 'angle': r[2 * i + 1]} for i in range(3)] for r in results],
+        'neutral_current': [{'magnitude': r[6], 'angle': r[7]} for r in results],
+    })
+
+# Streaming time series for offline analysis, see simstream.py.
+# POST {"schedule": [{"t": s, "p_y": [3], "p_delta": [3]}, ...], "sample_rate": Hz,
+# "duration": s, "chunk_size": n, "frequency": Hz, "format": "ndjson" | "float32"}.
+# The response is streamed chunk by chunk, so memory use does not grow with duration.
+MAX_SIMULATE_SAMPLES = 100_000_000
+MAX_SIMULATE_CHUNK = 65536
+
+@app.route('/simulate', methods=['POST'])
+def simulate_stream():
     data = request.json
-    p_y_values = data.get('p_y', [0.0, 0.0, 0.0])
-    p_delta_values = data.get('p_delta', [0.0, 0.0, 0.0])
-    
-    results = calculate_currents(p_y_values, p_delta_values)
-    return jsonify(results)
+    try:
+        schedule = simstream.parse_schedule(data.get('schedule', []))
+        sample_rate = float(data.get('sample_rate', 1000.0))
+        duration = float(data.get('duration', 1.0))
+        chunk_size = int(data.get('chunk_size', simstream.CHUNK_SIZE))
+        frequency = float(data.get('frequency', simstream.FREQUENCY))
+    except (AttributeError, TypeError, ValueError, OverflowError) as e:
+        return jsonify({'error': f'invalid simulation request: {e}'}), 400
+    fmt = data.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'float32'):
+        return jsonify({'error': 'format must be "ndjson" or "float32"'}), 400
+    if not (math.isfinite(sample_rate) and math.isfinite(duration) and math.isfinite(frequency)):
+        return jsonify({'error': 'sample_rate, duration and frequency must be finite'}), 400
+    if not (sample_rate > 0 and duration >= 0 and 0 < chunk_size <= MAX_SIMULATE_CHUNK):
+        return jsonify({'error': 'sample_rate and chunk_size must be positive, duration non-negative'}), 400
+    if sample_rate * duration > MAX_SIMULATE_SAMPLES:
+        return jsonify({'error': f'at most {MAX_SIMULATE_SAMPLES} samples per request'}), 413
+
+    chunks = simstream.simulate(schedule, sample_rate, duration, chunk_size, frequency, VOLTAGE_RMS)
+    mimetype = 'application/octet-stream' if fmt == 'float32' else 'application/x-ndjson'
+    response = Response(simstream.encode(chunks, fmt), mimetype=mimetype)
+    response.headers['X-Columns'] = ','.join(simstream.COLUMNS)
+    return response
+
+# Static image of the pygame view for clients without canvas/pygbag, see snapshot.py.
+# GET /snapshot?p_y=1,2,3&p_delta=4,5,6&t=0.5&w=800&h=600&format=png|webp
+snapshot_cache = SnapshotCache()
+snapshot_renderer = SnapshotRenderer()
+
+@app.route('/snapshot')
+def get_snapshot():
+    fmt = request.args.get('format', 'png')
+    if fmt not in FORMATS:
+        return jsonify({'error': f'format must be one of {sorted(FORMATS)}'}), 400
+    try:
+        powers = quantize_powers(request.args.get('p_y', '0,0,0').split(','),
+                                 request.args.get('p_delta', '0,0,0').split(','))
+        key = snapshot_key(powers, request.args.get('t', 0.0),
+                           request.args.get('w', 1200), request.args.get('h', 800), fmt)
+    except (TypeError, ValueError, OverflowError):
+        return jsonify({'error': 'p_y, p_delta, t, w and h must be numbers'}), 400
+    if len(powers) != 6:
+        return jsonify({'error': 'p_y and p_delta need three values each'}), 400
+
+    digest = key_digest(key)
+    if digest in request.if_none_match:
+        response = Response(status=304)
+    else:
+        data = snapshot_cache.get(digest, fmt)
+        if data is None:
+            try:
+                data = snapshot_renderer.render(key)
+            except SnapshotUnavailable as e:
+                return jsonify({'error': str(e)}), 501
+            snapshot_cache.put(digest, fmt, data)
+        response = Response(data, mimetype=FORMATS[fmt])
+    response.set_etag(digest)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
 
 # By AI agent Mima 2026-02-05 18:35:00: Run the Flask app
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+"""Serving modes for the 3-phase Flask app.
+
+    python serve.py --mode dev                  # Flask development server (same as app.py)
+    python serve.py --mode prefork --workers 4  # gunicorn, pre-forked gthread workers
+    python serve.py --mode asgi --workers 4     # uvicorn, ASGI with WebSocket at /ws
+
+The prefork and asgi modes keep connections alive between requests.
+uvicorn's h11 protocol also answers pipelined HTTP/1.1 requests in order.
+In asgi mode a tab can open ws://host/ws, send {"p_y": [...], "p_delta": [...]}
+messages and receive the same JSON as /calculate over one connection.
+HTTP routes still run the synchronous Flask app (via asgiref's WsgiToAsgi,
+in a thread), so for plain HTTP prefork is faster; asgi pays off on /ws.
+
+gunicorn, uvicorn and asgiref are optional; they are only used by the
+mode that needs them.
+"""
+import argparse
+import json
+import os
+import socket
+
+try:
+    from uvicorn.protocols.http.h11_impl import H11Protocol
+except ImportError: # Only the asgi mode needs uvicorn
+    H11Protocol = None
+
+from app import app, currents_response, parse_powers, three_values
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+KEEPALIVE_SECONDS = 30
+
+
+def currents_message(text):
+    """Answer for one WebSocket message, in the /calculate JSON format."""
+    try:
+        data = json.loads(text)
+        p_y_values, p_delta_values = data.get('p_y', [0.0, 0.0, 0.0]), data.get('p_delta', [0.0, 0.0, 0.0])
+        if not (three_values(p_y_values) and three_values(p_delta_values)):
+            return json.dumps({'error': 'p_y and p_delta need three values each'})
+        powers, key = parse_powers(p_y_values, p_delta_values)
+    except (AttributeError, TypeError, ValueError, OverflowError):
+        return json.dumps({'error': 'expected {"p_y": [3 numbers], "p_delta": [3 numbers]}'})
+    return currents_response(powers, key)[0]
+
+
+async def websocket_currents(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.connect':
+            await send({'type': 'websocket.accept'})
+        elif message['type'] == 'websocket.receive':
+            text = message.get('text') or (message.get('bytes') or b'').decode('utf-8', 'replace')
+            await send({'type': 'websocket.send', 'text': currents_message(text)})
+        elif message['type'] == 'websocket.disconnect':
+            return
+
+
+def create_asgi_app():
+    """ASGI app: WebSocket at /ws, all HTTP routes served by the Flask app."""
+    from asgiref.wsgi import WsgiToAsgi
+
+    http_app = WsgiToAsgi(app)
+
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'websocket':
+            if scope['path'] == '/ws':
+                await websocket_currents(scope, receive, send)
+            else:
+                await send({'type': 'websocket.close', 'code': 1008})
+            return
+        await http_app(scope, receive, send)
+
+    return asgi_app
+
+
+if H11Protocol is not None:
+    class NoDelayH11Protocol(H11Protocol):
+        """uvicorn's h11 protocol with TCP_NODELAY on every connection.
+
+        With several workers uvicorn binds the listening socket itself with
+        proto=0, so asyncio skips its usual TCP_NODELAY on accepted sockets.
+        The response head and body then go out as two small writes, and
+        Nagle holds the body until the client's delayed ACK (~40 ms).
+        """
+        def connection_made(self, transport):
+            sock = transport.get_extra_info('socket')
+            if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            super().connection_made(transport)
+
+
+def run_dev(args):
+    app.run(host=args.host, port=args.port, debug=args.debug)
+
+
+def run_prefork(args):
+    from gunicorn.app.base import BaseApplication
+
+    class PreforkApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{args.host}:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('keepalive', KEEPALIVE_SECONDS)
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            return app
+
+    PreforkApplication().run()
+
+
+def run_asgi(args):
+    import uvicorn
+
+    uvicorn.run('serve:create_asgi_app', factory=True, app_dir=APP_DIR, host=args.host, port=args.port,
+                workers=args.workers, http='serve:NoDelayH11Protocol', lifespan='off', log_level='warning',
+                timeout_keep_alive=KEEPALIVE_SECONDS)
+
+
+MODES = {'dev': run_dev, 'prefork': run_prefork, 'asgi': run_asgi}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=MODES, default='dev')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--debug', action=argparse.BooleanOptionalAction, default=True,
+                        help='debugger and reloader (dev)')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker (prefork)')
+    args = parser.parse_args()
+    MODES[args.mode](args)
+
+
+if __name__ == '__main__':
+    main()
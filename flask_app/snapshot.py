@@ -0,0 +1,216 @@
+"""Server-side PNG/WebP snapshots of the pygame ThreePhaseSim view.
+
+For clients that cannot run the pygbag build or the canvas script (e-ink
+displays, LMS thumbnails, report exports). Requests are quantized and the
+encoded image is cached in memory and on disk, so a repeat costs a dict
+lookup or a file read instead of a render.
+
+Rendering keeps a small pool of (sim, LayeredRenderer, surface) slots per
+size. A slot's static layer survives between requests, so a new load set
+or time only redraws the dynamic regions. pygame and main.py are imported
+on the first render, so the rest of the app runs without pygame. WebP
+needs Pillow.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+FORMATS = {'png': 'image/png', 'webp': 'image/webp'}
+MIN_SIZE = (160, 120)
+MAX_SIZE = (3840, 2160)
+T_STEP = 0.01 # Simulation time is quantized to this step
+POOL_SLOTS = 4 # Sizes kept rendered in the surface pool
+MEMORY_BYTES = 32 * 1024 * 1024
+DISK_FILES = 2000
+
+
+def default_cache_dir():
+    """Per-user cache directory, as assets.default_cache_dir (not the shared temp dir)."""
+    if os.environ.get('TREFAS_CACHE_DIR'):
+        return os.path.join(os.environ['TREFAS_CACHE_DIR'], 'snapshots')
+    base = (os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, '3fas', 'snapshots')
+
+
+def private_dir(path):
+    """Creates path (mode 0700) if missing; OSError if it is not a directory owned by this user."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not os.path.isdir(path) or os.path.islink(path):
+        raise OSError(f'{path} is not a directory')
+    # Files in the cache are sent to clients as they are, so nobody else may plant them
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise OSError(f'{path} is owned by another user')
+
+
+class SnapshotUnavailable(Exception):
+    """Rendering or encoding needs an optional package that is missing."""
+
+
+def snapshot_key(powers, t, width, height, fmt):
+    """Quantized, hashable key; powers is the six-tuple from quantize_powers."""
+    width = min(max(int(width), MIN_SIZE[0]), MAX_SIZE[0])
+    height = min(max(int(height), MIN_SIZE[1]), MAX_SIZE[1])
+    t = round(float(t) / T_STEP) * T_STEP
+    return tuple(powers) + (round(t, 6), width, height, fmt)
+
+
+def key_digest(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:24]
+
+
+class SnapshotCache:
+    """Bounded two-level cache of encoded images: memory LRU over a disk directory."""
+
+    def __init__(self, cache_dir=None, memory_bytes=MEMORY_BYTES, disk_files=DISK_FILES):
+        self.cache_dir = cache_dir or os.environ.get('SNAPSHOT_CACHE_DIR') or default_cache_dir()
+        self.memory_bytes = memory_bytes
+        self.disk_files = disk_files
+        self.memory = OrderedDict() # digest -> bytes
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        try:
+            private_dir(self.cache_dir)
+            entries = sorted(os.scandir(self.cache_dir), key=lambda e: e.stat().st_mtime)
+            self.disk = OrderedDict((e.name, None) for e in entries if e.is_file())
+        except OSError:
+            self.disk = None # No disk level
+
+    def get(self, digest, fmt):
+        name = f'{digest}.{fmt}'
+        with self.lock:
+            data = self.memory.get(name)
+            if data is not None:
+                self.memory.move_to_end(name)
+                self.stats['memory_hits'] += 1
+                return data
+        if self.disk is not None and name in self.disk:
+            try:
+                with open(os.path.join(self.cache_dir, name), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is not None:
+                with self.lock:
+                    self.stats['disk_hits'] += 1
+                    self.disk.move_to_end(name)
+                self.put_memory(name, data)
+                return data
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, digest, fmt, data):
+        name = f'{digest}.{fmt}'
+        self.put_memory(name, data)
+        if self.disk is None:
+            return
+        try:
+            tmp = os.path.join(self.cache_dir, f'.{name}.{os.getpid()}.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, os.path.join(self.cache_dir, name))
+        except OSError:
+            return
+        with self.lock:
+            self.disk[name] = None
+            self.disk.move_to_end(name)
+            evicted = []
+            while len(self.disk) > self.disk_files:
+                evicted.append(self.disk.popitem(last=False)[0])
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, old))
+            except OSError:
+                pass
+
+    def put_memory(self, name, data):
+        with self.lock:
+            if name in self.memory:
+                return
+            self.memory[name] = data
+            self.memory_size += len(data)
+            while self.memory_size > self.memory_bytes and len(self.memory) > 1:
+                _, old = self.memory.popitem(last=False)
+                self.memory_size -= len(old)
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+            self.memory_size = 0
+
+
+class SnapshotRenderer:
+    """Renders ThreePhaseSim frames headlessly from a pool of reusable surfaces."""
+
+    def __init__(self, slots=POOL_SLOTS):
+        self.slots = slots
+        self.pool = OrderedDict() # (width, height) -> (sim, renderer, surface)
+        self.lock = threading.Lock() # pygame is not thread-safe
+        self.renders = 0
+        self.sim_main = None
+        self.assets = None
+
+    def start(self):
+        if self.sim_main is not None:
+            return
+        try:
+            import main as sim_main
+        except ImportError as e:
+            raise SnapshotUnavailable(f'snapshots need pygame ({e})')
+        sim_main.init_headless(1, 1)
+        self.assets = sim_main.AssetCache()
+        self.sim_main = sim_main
+
+    def slot(self, size):
+        slot = self.pool.get(size)
+        if slot is not None:
+            self.pool.move_to_end(size)
+            return slot
+        sim = self.sim_main.ThreePhaseSim(*size, assets=self.assets)
+        # main.py resolves assets from the working directory; the server's may differ
+        sim.img_path = os.path.join(os.path.dirname(os.path.abspath(self.sim_main.__file__)), '3fas.jpg')
+        slot = (sim, self.sim_main.LayeredRenderer(sim), self.sim_main.pygame.Surface(size))
+        self.pool[size] = slot
+        if len(self.pool) > self.slots:
+            self.pool.popitem(last=False)
+        return slot
+
+    def render(self, key):
+        """Encoded image for a key from snapshot_key()."""
+        powers, t, width, height, fmt = key[:6], key[6], key[7], key[8], key[9]
+        if fmt == 'webp':
+            pillow_image() # Fail before rendering
+        with self.lock:
+            self.start()
+            sim, renderer, surface = self.slot((width, height))
+            for slider, p in zip(sim.sliders_y + sim.sliders_delta, powers):
+                slider.val = min(max(p, slider.min_val), slider.max_val)
+            sim.time = t
+            sim.calculate_currents()
+            renderer.render(surface)
+            self.renders += 1
+            if fmt == 'png':
+                buf = io.BytesIO()
+                self.sim_main.pygame.image.save(surface, buf, 'snapshot.png')
+                return buf.getvalue()
+            raw = self.sim_main.pygame.image.tobytes(surface, 'RGB')
+        return encode_webp(raw, (width, height))
+
+
+def pillow_image():
+    try:
+        from PIL import Image
+    except ImportError:
+        raise SnapshotUnavailable('WebP snapshots need Pillow (pip install pillow)')
+    return Image
+
+
+def encode_webp(raw, size):
+    buf = io.BytesIO()
+    pillow_image().frombytes('RGB', size, raw).save(buf, 'WEBP', quality=90)
+    return buf.getvalue()
@@ -0,0 +1,47 @@
+// Client-side port of calculate_currents in app.py, so the render loop
+// does not need a server round-trip per frame. Loaded as a plain script in
+// the browser (exposes window.ThreePhasePhysics) and via require() in Node.
+(function (root, factory) {
+    if (typeof module === 'object' && module.exports) {
+        module.exports = factory();
+    } else {
+        root.ThreePhasePhysics = factory();
+    }
+}(typeof self !== 'undefined' ? self : this, function () {
+    const VOLTAGE_RMS = 230.0;
+    const U_LINE_RMS = VOLTAGE_RMS * Math.sqrt(3);
+
+    // Unit phasors as [re, im]: Y (L1, L2, L3 to N) and delta (U12, U23, U31)
+    const rect = (angle) => [Math.cos(angle), Math.sin(angle)];
+    const U_PHASE = [rect(0), rect(-2 * Math.PI / 3), rect(-4 * Math.PI / 3)];
+    const U_LINE = [rect(Math.PI / 6), rect(-Math.PI / 2), rect(-7 * Math.PI / 6)];
+
+    function calculateCurrents(pYValues, pDeltaValues) {
+        const iY = U_PHASE.map((u, i) => {
+            const mag = Math.max(0, pYValues[i]) / VOLTAGE_RMS;
+            return [mag * u[0], mag * u[1]];
+        });
+        const iD = U_LINE.map((u, i) => {
+            const mag = Math.max(0, pDeltaValues[i]) / U_LINE_RMS;
+            return [mag * u[0], mag * u[1]];
+        });
+
+        // iL1 = iY1 + iD1 - iD3, iL2 = iY2 + iD2 - iD1, iL3 = iY3 + iD3 - iD2
+        const iTotal = [0, 1, 2].map((i) => {
+            const prev = (i + 2) % 3;
+            return [iY[i][0] + iD[i][0] - iD[prev][0], iY[i][1] + iD[i][1] - iD[prev][1]];
+        });
+        const iN = [
+            iTotal[0][0] + iTotal[1][0] + iTotal[2][0],
+            iTotal[0][1] + iTotal[1][1] + iTotal[2][1]
+        ];
+
+        const polar = (c) => ({ magnitude: Math.hypot(c[0], c[1]), angle: Math.atan2(c[1], c[0]) });
+        return {
+            line_currents: iTotal.map(polar),
+            neutral_current: polar(iN)
+        };
+    }
+
+    return { VOLTAGE_RMS, calculateCurrents };
+}));
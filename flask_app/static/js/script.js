@@ -26,6 +26,12 @@ const INITIAL_FREQ = 0.02; // By AI agent Mima 2026-02-05 18:40:00
 const MAX_FREQ = 0.5; // Adjusted for web visualization # By AI agent Mima 2026-02-05 18:40:00
 let currentFreq = INITIAL_FREQ; // By AI agent Mima 2026-02-05 18:40:00
 
+// Currents are computed locally (physics.js) whenever a slider changes; the
+// server is only asked to confirm them, debounced.
+const SERVER_SYNC_DELAY_MS = 300;
+let currentResults = null;
+let serverSyncTimer = null;
+
 // DOM elements
 const pDeltaSliders = [
     document.getElementById('p_delta_1'),
@@ -66,12 +72,14 @@ pDeltaSliders.forEach((slider, index) => {
     slider.addEventListener('input', () => {
         pDeltaValues[index].textContent = slider.value;
         updateSimulation();
+        scheduleServerSync();
     });
 });
 pYSliders.forEach((slider, index) => {
     slider.addEventListener('input', () => {
         pYValues[index].textContent = slider.value;
         updateSimulation();
+        scheduleServerSync();
     });
 });
 
@@ -86,6 +94,7 @@ resetButton.addEventListener('click', () => {
     });
     simulationTime = 0; // Reset simulation time on reset # By AI agent Mima 2026-02-05 18:40:00
     updateSimulation();
+    scheduleServerSync();
 });
 
 toggleSimulationButton.addEventListener('click', () => {
@@ -205,23 +214,21 @@ function drawArrow(startX, startY, endX, endY, headSize) {
     ctx.stroke(); // Ensure the line leading to the arrow is also stroked # By AI agent Mima 2026-02-05 18:40:00
 }
 
-async function updateSimulation() {
-    const p_y = pYSliders.map(slider => parseFloat(slider.value));
-    const p_delta = pDeltaSliders.map(slider => parseFloat(slider.value));
-
-    // Send data to Flask backend
-    const response = await fetch('/calculate', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ p_y, p_delta }),
-    });
-    const data = await response.json();
+function readSliders() {
+    return {
+        p_y: pYSliders.map(slider => parseFloat(slider.value)),
+        p_delta: pDeltaSliders.map(slider => parseFloat(slider.value))
+    };
+}
+
+// Recompute the currents locally and redraw; called when sliders change
+function updateSimulation() {
+    const { p_y, p_delta } = readSliders();
+    currentResults = ThreePhasePhysics.calculateCurrents(p_y, p_delta);
 
     // Update display values
-    const lineCurrents = data.line_currents;
-    const neutralCurrent = data.neutral_current;
+    const lineCurrents = currentResults.line_currents;
+    const neutralCurrent = currentResults.neutral_current;
 
     iL1Mag.textContent = lineCurrents[0].magnitude.toFixed(1);
     iL1Angle.textContent = (lineCurrents[0].angle * 180 / Math.PI).toFixed(1);
@@ -232,10 +239,37 @@ async function updateSimulation() {
     iNMag.textContent = neutralCurrent.magnitude.toFixed(1);
     iNAngle.textContent = (neutralCurrent.angle * 180 / Math.PI).toFixed(1);
 
-    // Draw on canvas
+    drawFrame();
+}
+
+function drawFrame() {
     ctx.clearRect(0, 0, canvas.width, canvas.height); // Clear entire canvas before drawing # By AI agent Mima 2026-02-05 18:40:00
-    drawPhasorDiagram(lineCurrents, neutralCurrent);
-    drawSineWaves(lineCurrents, neutralCurrent);
+    drawPhasorDiagram(currentResults.line_currents, currentResults.neutral_current);
+    drawSineWaves(currentResults.line_currents, currentResults.neutral_current);
+}
+
+function scheduleServerSync() {
+    clearTimeout(serverSyncTimer);
+    serverSyncTimer = setTimeout(syncWithServer, SERVER_SYNC_DELAY_MS);
+}
+
+// Ask the server for the same operating point and warn if it disagrees
+async function syncWithServer() {
+    const sliders = readSliders();
+    try {
+        // GET so the browser can reuse cached responses (ETag/Cache-Control)
+        const query = `p_y=${sliders.p_y.join(',')}&p_delta=${sliders.p_delta.join(',')}`;
+        const response = await fetch(`/calculate?${query}`);
+        const data = await response.json();
+        const local = ThreePhasePhysics.calculateCurrents(sliders.p_y, sliders.p_delta);
+        const serverAll = data.line_currents.concat([data.neutral_current]);
+        const localAll = local.line_currents.concat([local.neutral_current]);
+        if (serverAll.some((c, i) => Math.abs(c.magnitude - localAll[i].magnitude) > 1e-6)) {
+            console.warn('Client and server currents differ', sliders, data, local);
+        }
+    } catch (err) {
+        console.warn('Could not reach /calculate', err);
+    }
 }
 
 function animate() {
@@ -246,7 +280,7 @@ function animate() {
     if (!isPaused) {
         currentFreq = Math.min(currentFreq, MAX_FREQ); // Cap frequency # By AI agent Mima 2026-02-05 18:40:00
         simulationTime += currentFreq * deltaTime; // Update simulation time # By AI agent Mima 2026-02-05 18:40:00
-        updateSimulation();
+        drawFrame();
     }
     animationFrameId = requestAnimationFrame(animate);
 }
@@ -265,3 +299,4 @@ if (!isPaused) {
 }
 
 updateSimulation();
+scheduleServerSync();
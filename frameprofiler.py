@@ -0,0 +1,164 @@
+"""Tidmätning per bild och sektion, med overlay och export.
+
+Huvudloopen anropar start_frame(), mark(namn) efter varje sektion och
+end_frame(). mark() bokför tiden sedan föregående markering på sektionen.
+Tiden i sektionen IDLE_SECTION (väntan på nästa bild) räknas inte som
+arbete: "work" är bildens tid utan den, och det är den som jämförs med
+budgeten, medan "frame" är hela tiden mellan bilderna.
+När profileraren är avstängd gör anropen ingenting, så den kan ligga kvar
+i produktion.
+"""
+import time
+from collections import deque
+
+import pygame
+
+PROFILE_WINDOW = 3600 # Frames kept for statistics and export
+HISTOGRAM_EDGES_MS = (0.25, 0.5, 1, 2, 4, 8, 16, 33, 66)
+OVERLAY_REFRESH = 0.5 # Seconds between overlay text updates
+IDLE_SECTION = "yield" # Waiting for the next frame, not work
+
+
+class FrameProfiler:
+    def __init__(self, enabled=False, target_fps=60):
+        self.enabled = enabled
+        self.target_fps = target_fps
+        self.frames = deque(maxlen=PROFILE_WINDOW) # (frame start, total ms, work ms, {section: ms})
+        self.sections = []
+        self.current = {}
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.overlay_visible = False
+        self.overlay_surf = None
+        self.overlay_time = 0.0
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.current = {}
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[name] = self.current.get(name, 0.0) + (now - self.last_mark) * 1000
+        self.last_mark = now
+        if name not in self.sections:
+            self.sections.append(name)
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self.frame_start) * 1000
+        work = total - self.current.get(IDLE_SECTION, 0.0)
+        self.frames.append((self.frame_start, total, work, self.current))
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible and not self.enabled:
+            # start_frame() returned early this frame; start timing from here
+            self.enabled = True
+            self.frame_start = self.last_mark = time.perf_counter()
+            self.current = {}
+
+    def fps(self):
+        if len(self.frames) < 2:
+            return 0.0
+        span = self.frames[-1][0] - self.frames[0][0]
+        return (len(self.frames) - 1) / span if span > 0 else 0.0
+
+    def section_times(self, name):
+        if name == "frame":
+            return [total for _, total, _, _ in self.frames]
+        if name == "work":
+            return [work for _, _, work, _ in self.frames]
+        return [sections.get(name, 0.0) for _, _, _, sections in self.frames]
+
+    def histogram(self, times):
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for t in times:
+            for i, edge in enumerate(HISTOGRAM_EDGES_MS):
+                if t < edge:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+
+    def stats(self):
+        """Medel, p50, p95, max och histogram (ms) per sektion."""
+        result = {}
+        for name in self.sections + ["work", "frame"]:
+            times = sorted(self.section_times(name))
+            if not times:
+                continue
+            result[name] = {
+                "mean_ms": sum(times) / len(times),
+                "p50_ms": times[len(times) // 2],
+                "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+                "max_ms": times[-1],
+                "histogram": self.histogram(times),
+            }
+        return result
+
+    def dump(self, path):
+        """Skriver statistik som JSON, eller en rad per bild om path slutar på .csv."""
+        import csv # Only needed at exit
+        import json
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "start_s", "total_ms", "work_ms"] + self.sections)
+                for i, (start, total, work, sections) in enumerate(self.frames):
+                    writer.writerow([i, f"{start:.6f}", f"{total:.4f}", f"{work:.4f}"] +
+                                    [f"{sections.get(name, 0.0):.4f}" for name in self.sections])
+        else:
+            with open(path, "w") as f:
+                json.dump({
+                    "frames": len(self.frames),
+                    "fps": self.fps(),
+                    "target_fps": self.target_fps,
+                    "histogram_edges_ms": HISTOGRAM_EDGES_MS,
+                    "sections": self.stats(),
+                }, f, indent=2)
+
+    def overlay_rect(self, surface):
+        if not self.overlay_visible or self.overlay_surf is None:
+            return None
+        return self.overlay_surf.get_rect(topright=(surface.get_width() - 4, 4))
+
+    def draw_overlay(self, surface, font):
+        """Ritar FPS och sektionstider uppe till höger. Returnerar rektangeln eller None."""
+        if not self.overlay_visible:
+            return None
+        now = time.perf_counter()
+        if self.overlay_surf is None or now - self.overlay_time > OVERLAY_REFRESH:
+            self.overlay_time = now
+            self.overlay_surf = self.render_overlay(font)
+        rect = self.overlay_rect(surface)
+        surface.blit(self.overlay_surf, rect)
+        return rect
+
+    def render_overlay(self, font):
+        budget = 1000 / self.target_fps
+        stats = self.stats()
+        # Compare the work, not the time spent waiting for the next frame, with the budget
+        work = stats.get("work", {"mean_ms": 0.0, "p95_ms": 0.0})
+        lines = [(f"FPS {self.fps():5.1f}  work {work['mean_ms']:5.2f} ms (p95 {work['p95_ms']:5.2f}) "
+                  f"/ {budget:.1f} ms", (255, 100, 100) if work["p95_ms"] > budget else (120, 255, 120))]
+        for name in self.sections:
+            s = stats.get(name)
+            if s:
+                lines.append((f"{name:<14} {s['mean_ms']:6.2f}  p95 {s['p95_ms']:6.2f}", (220, 220, 220)))
+        rendered = [font.render(text, True, color) for text, color in lines]
+        pad = 6
+        w = max(r.get_width() for r in rendered) + 2 * pad
+        h = sum(r.get_height() for r in rendered) + 2 * pad
+        surf = pygame.Surface((w, h))
+        surf.fill((0, 0, 0))
+        y = pad
+        for r in rendered:
+            surf.blit(r, (pad, y))
+            y += r.get_height()
+        return surf
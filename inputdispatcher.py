@@ -0,0 +1,99 @@
+"""Central fördelning av mus- och pekhändelser till komponenter.
+
+Komponenternas träffytor läggs i ett rutnät (HitIndex) som bara byggs om
+när layouten ändras. Ett tryck går till komponenten under pekaren, som
+sedan får alla drag och släpp för samma pekare tills den släpps. Musen
+och varje finger är egna pekare, så flera reglage kan dras samtidigt på
+en pekskärm. En bild utan händelser (och utan pågående musdrag) kostar
+ingenting.
+
+Komponenter har on_press(pos), on_drag(pos) och on_release(pos).
+"""
+import pygame
+
+HIT_CELL_PX = 64
+MOUSE = "mouse"
+
+
+class HitIndex:
+    """Rutnät över träffytor; första registrerade ytan som träffas vinner."""
+    def __init__(self, cell_size=HIT_CELL_PX):
+        self.cell_size = cell_size
+        self.entries = []
+        self.cells = {}
+
+    def rebuild(self, entries):
+        """entries: [(Rect, komponent)] i prioritetsordning."""
+        self.entries = [(pygame.Rect(rect), target) for rect, target in entries]
+        self.cells = {}
+        c = self.cell_size
+        for i, (rect, _) in enumerate(self.entries):
+            for cx in range(rect.left // c, (rect.right - 1) // c + 1):
+                for cy in range(rect.top // c, (rect.bottom - 1) // c + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    def hit(self, pos):
+        c = self.cell_size
+        for i in self.cells.get((int(pos[0]) // c, int(pos[1]) // c), ()):
+            rect, target = self.entries[i]
+            if rect.collidepoint(pos):
+                return target
+        return None
+
+
+class InputDispatcher:
+    def __init__(self, cell_size=HIT_CELL_PX):
+        self.index = HitIndex(cell_size)
+        self.captured = {} # pointer -> component being dragged
+        self.last_mouse = None
+
+    def rebuild(self, entries):
+        self.index.rebuild(entries)
+
+    def press(self, pointer, pos):
+        target = self.index.hit(pos)
+        if target is not None:
+            self.captured[pointer] = target
+            target.on_press(pos)
+        return target
+
+    def release(self, pointer, pos):
+        target = self.captured.pop(pointer, None)
+        if target is not None:
+            target.on_release(pos)
+
+    def dispatch(self, events, mouse_pos, size):
+        """Fördelar bildens händelser. Returnerar False om det inte fanns något att göra.
+
+        mouse_pos är pekaren lästa en gång för bilden; fingrarnas positioner
+        (0..1) räknas om till bildpunkter med size.
+        """
+        mouse_drag = MOUSE in self.captured and mouse_pos != self.last_mouse
+        if not events and not mouse_drag:
+            return False
+        w, h = size
+        for event in events:
+            etype = event.type
+            # Mouse events that SDL synthesizes from touches are handled as fingers
+            if etype == pygame.MOUSEBUTTONDOWN and not getattr(event, "touch", False):
+                self.press(MOUSE, mouse_pos)
+            elif etype == pygame.MOUSEBUTTONUP and not getattr(event, "touch", False):
+                self.release(MOUSE, mouse_pos)
+            elif etype in (pygame.FINGERDOWN, pygame.FINGERMOTION, pygame.FINGERUP):
+                pointer = (getattr(event, "touch_id", 0), event.finger_id)
+                pos = (event.x * w, event.y * h)
+                if etype == pygame.FINGERDOWN:
+                    target = self.press(pointer, pos)
+                    if target is not None:
+                        target.on_drag(pos)
+                elif etype == pygame.FINGERMOTION:
+                    target = self.captured.get(pointer)
+                    if target is not None:
+                        target.on_drag(pos)
+                else:
+                    self.release(pointer, pos)
+        target = self.captured.get(MOUSE)
+        if target is not None:
+            target.on_drag(mouse_pos)
+        self.last_mouse = mouse_pos
+        return True
@@ -0,0 +1,146 @@
+"""Lastnät med godtyckligt många laster i Y- eller Δ-koppling.
+
+Varje last ges som aktiv effekt med effektfaktor (vid märkspänning) eller
+som komplex impedans. Alla laster samlas till komplexa admittanser per fas
+och löses i ett svep: Y-laster mot N (eller mot en flytande stjärnpunkt om
+N är bruten), Δ-laster mellan faserna.
+
+Positiv effektfaktor betyder induktiv (eftersläpande) last, negativ
+kapacitiv. numpy används om det finns, annars vanliga loopar.
+"""
+import math
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError: # Webbversionen (pygbag) klarar sig utan numpy
+    np = None
+
+from physics import U_PHASE, VOLTAGE_RMS
+
+Y = "Y"
+DELTA = "delta"
+
+NetworkSolution = namedtuple("NetworkSolution", "line_currents neutral_current neutral_shift")
+NetworkSolution.__doc__ = """Linjeströmmar (L1, L2, L3), neutralström och stjärnpunktens förskjutning (V), komplexa."""
+
+
+def admittance_from_power(power, power_factor, voltage):
+    """Admittans för en last som tar power (W) vid effektfaktorn och spänningen voltage."""
+    if power_factor == 0 or abs(power_factor) > 1:
+        raise ValueError(f"power factor must be in [-1, 0) or (0, 1], got {power_factor}")
+    q = power * math.sqrt(1 - power_factor ** 2) / abs(power_factor)
+    if power_factor < 0:
+        q = -q
+    # S = P + jQ = V^2 * conj(Y)  =>  Y = (P - jQ) / V^2
+    return complex(power, -q) / voltage ** 2
+
+
+def solve_phase_admittances(y_star, y_delta, voltage_rms=VOLTAGE_RMS, neutral_connected=True):
+    """Löser nätet givet summerade admittanser per fas.
+
+    y_star[k] är Y-lasterna mellan Lk och N, y_delta[k] Δ-lasterna mellan
+    Lk och L(k+1) (L1-L2, L2-L3, L3-L1).
+    """
+    e = [voltage_rms * u for u in U_PHASE]
+    shift = 0j
+    if not neutral_connected:
+        # Millman: potential of the floating star point
+        y_sum = y_star[0] + y_star[1] + y_star[2]
+        if y_sum != 0:
+            shift = (y_star[0] * e[0] + y_star[1] * e[1] + y_star[2] * e[2]) / y_sum
+    i_y = [y_star[k] * (e[k] - shift) for k in range(3)]
+    i_d = [y_delta[k] * (e[k] - e[(k + 1) % 3]) for k in range(3)]
+    # iL1 = iY1 + iD12 - iD31, iL2 = iY2 + iD23 - iD12, iL3 = iY3 + iD31 - iD23
+    line = tuple(i_y[k] + i_d[k] - i_d[k - 1] for k in range(3))
+    neutral = line[0] + line[1] + line[2] if neutral_connected else 0j
+    return NetworkSolution(line, neutral, shift)
+
+
+class LoadNetwork:
+    def __init__(self, voltage_rms=VOLTAGE_RMS):
+        self.voltage_rms = voltage_rms
+        self.is_delta = [] # One entry per load
+        self.phases = []
+        self.admittances = []
+        self.packed = None # (bins, admittances) as numpy arrays, rebuilt after changes
+
+    def __len__(self):
+        return len(self.admittances)
+
+    def load_voltage(self, connection):
+        if connection == Y:
+            return self.voltage_rms
+        if connection == DELTA:
+            return self.voltage_rms * math.sqrt(3)
+        raise ValueError(f"connection must be {Y!r} or {DELTA!r}, got {connection!r}")
+
+    def add_load(self, connection, phase, power=None, power_factor=1.0, impedance=None):
+        """Lägger till en last och returnerar dess index.
+
+        phase är 0, 1 eller 2: L1/L2/L3 mot N för Y, L1-L2/L2-L3/L3-L1 för Δ.
+        Ange antingen power (W, med power_factor) eller impedance (ohm).
+        """
+        voltage = self.load_voltage(connection)
+        if phase not in (0, 1, 2):
+            raise ValueError(f"phase must be 0, 1 or 2, got {phase!r}")
+        if (power is None) == (impedance is None):
+            raise ValueError("give either power or impedance")
+        if impedance is not None:
+            admittance = 1 / complex(impedance)
+        else:
+            admittance = admittance_from_power(power, power_factor, voltage)
+        self.is_delta.append(connection == DELTA)
+        self.phases.append(phase)
+        self.admittances.append(admittance)
+        self.packed = None
+        return len(self.admittances) - 1
+
+    def add_loads(self, connection, phases, powers, power_factors=1.0):
+        """Lägger till många laster på en gång (sekvenser av samma längd)."""
+        voltage = self.load_voltage(connection)
+        phases = list(phases)
+        if any(p not in (0, 1, 2) for p in phases):
+            raise ValueError("phases must be 0, 1 or 2")
+        if np is not None:
+            p = np.asarray(powers, dtype=np.float64)
+            pf = np.broadcast_to(np.asarray(power_factors, dtype=np.float64), p.shape)
+            if np.any((pf == 0) | (np.abs(pf) > 1)):
+                raise ValueError("power factors must be in [-1, 0) or (0, 1]")
+            q = np.copysign(p * np.sqrt(1 - pf ** 2) / np.abs(pf), pf)
+            admittances = ((p - 1j * q) / voltage ** 2).tolist()
+        else:
+            if not isinstance(power_factors, (list, tuple)):
+                power_factors = [power_factors] * len(phases)
+            admittances = [admittance_from_power(p, pf, voltage) for p, pf in zip(powers, power_factors)]
+        if len(admittances) != len(phases):
+            raise ValueError("phases and powers must have the same length")
+        self.is_delta.extend([connection == DELTA] * len(phases))
+        self.phases.extend(phases)
+        self.admittances.extend(admittances)
+        self.packed = None
+
+    def phase_admittances(self):
+        """Summerade admittanser per fas: (y_star[3], y_delta[3])."""
+        if np is not None and self.admittances:
+            if self.packed is None:
+                # Bins 0-2: Y loads per phase, 3-5: delta loads per phase pair
+                bins = np.asarray(self.phases, dtype=np.intp) + 3 * np.asarray(self.is_delta, dtype=np.intp)
+                self.packed = (bins, np.asarray(self.admittances, dtype=np.complex128))
+            bins, adm = self.packed
+            sums = (np.bincount(bins, weights=adm.real, minlength=6)
+                    + 1j * np.bincount(bins, weights=adm.imag, minlength=6)).tolist()
+            return sums[:3], sums[3:]
+        y_star = [0j, 0j, 0j]
+        y_delta = [0j, 0j, 0j]
+        for is_delta, phase, adm in zip(self.is_delta, self.phases, self.admittances):
+            if is_delta:
+                y_delta[phase] += adm
+            else:
+                y_star[phase] += adm
+        return y_star, y_delta
+
+    def solve(self, neutral_connected=True):
+        """Linje- och neutralströmmar; med neutral_connected=False flyter stjärnpunkten."""
+        y_star, y_delta = self.phase_admittances()
+        return solve_phase_admittances(y_star, y_delta, self.voltage_rms, neutral_connected)
@@ -3,8 +3,19 @@ import math
 import sys
 import os
 import asyncio # KRÄVS FÖR WEBBEN
-import cmath
 import time # By AI agent Mima 2026-02-05 17:10:10
+from array import array
+from collections import OrderedDict
+
+import physics
+from assets import AssetCache
+from frameprofiler import FrameProfiler
+from inputdispatcher import InputDispatcher
+
+try:
+    import numpy as np
+except ImportError: # Webbversionen (pygbag) klarar sig utan numpy
+    np = None
 
 # --- Färger ---
 COLOR_BG = (15, 15, 20)
@@ -25,11 +36,32 @@ COLOR_P23_LABEL = (255, 0, 255) # Magenta
 COLOR_P31_LABEL = (255, 165, 0) # Orange
 
 # Fysikparametrar
-VOLTAGE_RMS = 230.0
+VOLTAGE_RMS = physics.VOLTAGE_RMS
 INITIAL_FREQ = 1
 MAX_FREQ = 5
 BASE_PIXELS_PER_AMP = 10.0 
 
+# Driftpunktstabell (tools/build_lut.py), samma filnamn som oplut.DEFAULT_PATH
+OP_TABLE_FILE = "operating_points.lut"
+
+# Textcache
+TEXT_CACHE_SIZE = 512
+
+# Bildfrekvens
+TARGET_FPS = 60
+IDLE_FPS = 10
+IDLE_TIMEOUT = 30.0 # Seconds without input before dropping to IDLE_FPS
+PAUSED_IDLE_TIMEOUT = 2.0 # Same when paused; sliders can still be dragged
+# Quality levels: (sine step multiplier, dashed lines)
+QUALITY_LEVELS = [(1, True), (2, True), (4, False)]
+
+# Sinuskurvor
+SINE_T_PER_PX = 0.05 # Phase advance per pixel along the time axis
+SINE_LUT_BITS = 12
+SINE_LUT_SIZE = 1 << SINE_LUT_BITS
+SINE_LUT_SCALE = SINE_LUT_SIZE / (2 * math.pi)
+SINE_LUT = [math.sin(i / SINE_LUT_SCALE) for i in range(SINE_LUT_SIZE)]
+
 def resource_path(relative_path):
     """Hjälpfunktion för sökvägar."""
     try:
@@ -38,6 +70,160 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def mark_interactive():
+    """I webbläsaren: tidpunkten för första bilden, som benchmarks/bench_web.py läser."""
+    if sys.platform == "emscripten":
+        import platform
+        platform.window.eval("window.trefasInteractive = performance.now()")
+
+def sine_traces(phasors, t, offset_x, offset_y, width, step):
+    """Punktlistor för alla kurvor på en gång, en per (amplitud, vinkel) i phasors.
+
+    Med numpy beräknas alla y-värden som en (len(phasors), N)-array, annars
+    används SINE_LUT. Punktlistorna byggs med zip eftersom pygame.draw.lines
+    är snabbare på tupler än på numpy-rader.
+    """
+    if np is not None:
+        xs = np.arange(0, width, step, dtype=np.float64)
+        mags = np.array([m for m, _ in phasors], dtype=np.float64)
+        angles = np.array([a for _, a in phasors], dtype=np.float64)
+        ys = (t + angles)[:, None] + xs * SINE_T_PER_PX
+        np.sin(ys, out=ys)
+        ys *= -mags[:, None]
+        ys += offset_y
+        px = (xs + offset_x).tolist()
+        return [list(zip(px, row)) for row in ys.tolist()]
+
+    xs, lut_offsets = _lut_columns(offset_x, width, step)
+    mask = SINE_LUT_SIZE - 1
+    lut = SINE_LUT
+    traces = []
+    for mag, angle in phasors:
+        base = int(round((t + angle) * SINE_LUT_SCALE))
+        traces.append([(x, offset_y - mag * lut[(base + k) & mask]) for x, k in zip(xs, lut_offsets)])
+    return traces
+
+_lut_columns_cache = {}
+
+def _lut_columns(offset_x, width, step):
+    # x coordinates and their phase offsets as LUT indices, per layout
+    key = (offset_x, width, step)
+    cols = _lut_columns_cache.get(key)
+    if cols is None:
+        _lut_columns_cache.clear()
+        xs = range(0, width, step)
+        cols = ([offset_x + x for x in xs], [int(round(x * SINE_T_PER_PX * SINE_LUT_SCALE)) for x in xs])
+        _lut_columns_cache[key] = cols
+    return cols
+
+class WaveformHistory:
+    """Ringbuffert med samplade momentanvärden (A) för L1, L2, L3 och N."""
+    CHANNELS = 4
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = [array('d', bytes(8 * capacity)) for _ in range(self.CHANNELS)]
+        self.head = 0 # Next index to write
+        self.count = 0
+
+    def append(self, values):
+        head = self.head
+        for channel, v in zip(self.data, values):
+            channel[head] = v
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def channel(self, ch):
+        """Samplen för en kanal, äldst först."""
+        data = self.data[ch]
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            return data[start:start + self.count]
+        return data[start:] + data[:self.head]
+
+    def latest(self, ch, n=1):
+        """De n senaste samplen för en kanal, äldst först."""
+        n = min(n, self.count)
+        data = self.data[ch]
+        return array('d', (data[(self.head - n + k) % self.capacity] for k in range(n)))
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+class FontRegistry:
+    """Alla typsnitt för en given skala, skapas en gång per skala."""
+    def __init__(self, assets):
+        self.assets = assets
+        self.scale = None
+        self.main = None
+        self.small = None
+        self.heading = None
+        self.label = None
+        self.label_italic = None
+
+    def resolve(self, scale):
+        """Skapa typsnitten för scale. Returnerar True om de byttes ut."""
+        if scale == self.scale:
+            return False
+        self.scale = scale
+        main_font_size = max(12, int(18 * scale))
+        small_font_size = max(10, int(20 * scale))
+        heading_font_size = max(12, int(25 * scale))
+
+        self.main = self.assets.font("Arial", main_font_size)
+        self.small = self.assets.font("Arial", small_font_size)
+        self.heading = self.assets.font("Arial", heading_font_size, italic=True)
+
+        # Slider labels: DejaVu Sans for subscripts/em-dashes, italic Arial for 'P'
+        label_size = self.main.get_height()
+        font_path = self.assets.match_font('dejavusans')
+        if font_path:
+            self.label = pygame.font.Font(font_path, label_size)
+        else:
+            self.label = self.assets.font("Arial", label_size)
+        self.label_italic = self.assets.font("Arial", label_size, italic=True)
+        return True
+
+class TextCache:
+    """LRU-cache för renderade textytor, nyckel (text, font, färg)."""
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, factory):
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = factory()
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def render(self, text, font, color):
+        return self.get((text, font, color), lambda: font.render(text, True, color))
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
 class Slider:
     def __init__(self, val_range, initial_val, label, color): # Removed is_italic parameter # By AI agent Mima 2026-02-05 19:15:00
         self.min_val, self.max_val = val_range
@@ -50,23 +236,42 @@ class Slider:
     def set_layout(self, x, y, w, h):
         self.rect = pygame.Rect(x, y, w, h)
 
-    def update(self, event_list):
-        mx, my = pygame.mouse.get_pos()
-        for event in event_list:
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.rect.collidepoint(mx, my) or (abs(mx - self.rect.centerx) < self.rect.width/2 + 20 and abs(my - self.rect.centery) < 20):
-                    if self.rect.x <= mx <= self.rect.right:
-                        self.dragging = True
-            elif event.type == pygame.MOUSEBUTTONUP:
-                self.dragging = False
-        
-        if self.dragging:
-            mx = max(self.rect.left, min(self.rect.right, mx))
-            ratio = (mx - self.rect.left) / self.rect.width
-            raw_val = self.min_val + ratio * (self.max_val - self.min_val)
-            self.val = round(raw_val / 10) * 10
+    def hit_rect(self):
+        # The bar plus 20 px above and below its centre line
+        r = self.rect
+        return r.union(pygame.Rect(r.x, r.centery - 19, r.width + 1, 39))
+
+    def on_press(self, pos):
+        self.dragging = True
 
-    def draw(self, surface, font):
+    def on_drag(self, pos):
+        mx = max(self.rect.left, min(self.rect.right, pos[0]))
+        ratio = (mx - self.rect.left) / self.rect.width
+        raw_val = self.min_val + ratio * (self.max_val - self.min_val)
+        self.val = round(raw_val / 10) * 10
+
+    def on_release(self, pos):
+        self.dragging = False
+
+    def render_label(self, fonts, text_cache):
+        # By AI agent Mima 2026-02-05 17:55:00: Custom rendering for italic 'P', subscripts, and em-dashes
+        parts = self.label.split(' ', 1) # Split label into 'P' and the rest
+        if len(parts) > 1 and parts[0].startswith('P'):
+            # Render 'P' in italic, the rest (with subscripts and em-dashes) in the unicode font
+            p_surf = text_cache.render(parts[0], fonts.label_italic, self.color)
+            rest_surf = fonts.label.render(f"{parts[1]}: {int(self.val)} W", True, self.color)
+
+            # Combine surfaces
+            total_width = p_surf.get_width() + rest_surf.get_width()
+            total_height = max(p_surf.get_height(), rest_surf.get_height())
+            combined_surf = pygame.Surface((total_width, total_height), pygame.SRCALPHA)
+            combined_surf.blit(p_surf, (0, (total_height - p_surf.get_height()) // 2))
+            combined_surf.blit(rest_surf, (p_surf.get_width(), (total_height - rest_surf.get_height()) // 2))
+            return combined_surf
+        # Fallback for labels that don't fit the 'P' pattern
+        return fonts.label.render(f"{self.label}: {int(self.val)} W", True, self.color)
+
+    def draw(self, surface, fonts, text_cache):
         pygame.draw.rect(surface, (60, 60, 60), self.rect, border_radius=5)
         ratio = (self.val - self.min_val) / (self.max_val - self.min_val)
         fill_rect = pygame.Rect(self.rect.x, self.rect.y, int(self.rect.width * ratio), self.rect.height)
@@ -76,69 +281,66 @@ class Slider:
         knob_x = self.rect.x + int(self.rect.width * ratio)
         pygame.draw.circle(surface, (200, 200, 200), (knob_x, self.rect.centery), knob_radius)
         
-        # By AI agent Mima 2026-02-05 17:55:00: Custom rendering for italic 'P', subscripts, and em-dashes
-        # Attempt to use a font known for good Unicode support (DejaVu Sans), or fallback to Arial.
-        font_path = pygame.font.match_font('dejavusans') # By AI agent Mima 2026-02-05 17:55:00
-        if font_path: # By AI agent Mima 2026-02-05 17:55:00
-            display_font = pygame.font.Font(font_path, font.get_height()) # By AI agent Mima 2026-02-05 17:55:00
-        else: # By AI agent Mima 2026-02-05 17:55:00
-            display_font = pygame.font.SysFont("Arial", font.get_height()) # By AI agent Mima 2026-02-05 17:55:00
-
-        parts = self.label.split(' ', 1) # Split label into 'P' and the rest
-        if len(parts) > 1 and parts[0].startswith('P'):
-            # Render 'P' in italic
-            p_font = pygame.font.SysFont("Arial", font.get_height(), italic=True) # By AI agent Mima 2026-02-05 17:45:00
-            p_surf = p_font.render(parts[0], True, self.color) # By AI agent Mima 2026-02-05 17:45:00
-
-            # Render the rest of the label (with subscripts and em-dashes)
-            rest_label = f"{parts[1]}: {int(self.val)} W" # By AI agent Mima 2026-02-05 17:45:00
-            rest_surf = display_font.render(rest_label, True, self.color) # By AI agent Mima 2026-02-05 17:45:00
-            
-            # Combine surfaces
-            total_width = p_surf.get_width() + rest_surf.get_width() # By AI agent Mima 2026-02-05 17:45:00
-            total_height = max(p_surf.get_height(), rest_surf.get_height()) # By AI agent Mima 2026-02-05 17:45:00
-            combined_surf = pygame.Surface((total_width, total_height), pygame.SRCALPHA) # By AI agent Mima 2026-02-05 17:45:00
-            combined_surf.blit(p_surf, (0, (total_height - p_surf.get_height()) // 2)) # By AI agent Mima 2026-02-05 17:45:00
-            combined_surf.blit(rest_surf, (p_surf.get_width(), (total_height - rest_surf.get_height()) // 2)) # By AI agent Mima 2026-02-05 17:45:00
-            label_surf = combined_surf # By AI agent Mima 2026-02-05 17:45:00
-        else:
-            # Fallback for labels that don't fit the 'P' pattern
-            label_surf = display_font.render(f"{self.label}: {int(self.val)} W", True, self.color) # By AI agent Mima 2026-02-05 17:45:00
+        key = (self.label, int(self.val), fonts.label, self.color)
+        label_surf = text_cache.get(key, lambda: self.render_label(fonts, text_cache))
 
         margin = max(5, int(self.rect.height * 0.5))
         surface.blit(label_surf, (self.rect.x, self.rect.y - label_surf.get_height() - margin))
 
+class Button:
+    """Tryckknapp; ritas av ThreePhaseSim.draw_button."""
+    def __init__(self, action):
+        self.action = action
+
+    def on_press(self, pos):
+        self.action()
+
+    def on_drag(self, pos):
+        pass
+
+    def on_release(self, pos):
+        pass
+
+class LiveInput:
+    """Systemklockan och pygames muspekare (session.ReplayInput vid uppspelning)."""
+    def now(self):
+        return time.time()
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
 class ThreePhaseSim:
-    def __init__(self, width, height):
+    def __init__(self, width, height, profiler=None, assets=None, clock=None, input_source=None):
+        self.profiler = profiler or FrameProfiler()
+        # Fonts and the scaled circuit image, remembered between runs
+        self.assets = assets or AssetCache()
+        # Time and mouse come from here (live or a replayed session, see session.py)
+        live = LiveInput()
+        self.clock = clock or live
+        self.input = input_source or live
+        self.mouse = (0, 0) # Mouse position read once per update
         self.time = 0.0
         self.paused = False
         self.current_freq = INITIAL_FREQ # Current simulation frequency # By AI agent Mima 2026-02-05 17:10:10
         self.max_freq = MAX_FREQ # Max simulation frequency # By AI agent Mima 2026-02-05 17:10:10
-        self.last_update_time = time.time() # By AI agent Mima 2026-02-05 17:10:10
+        self.last_update_time = self.clock.now() # By AI agent Mima 2026-02-05 17:10:10
 
         self.base_w = 1200
         self.base_h = 800
         self.scale = 1.0
         self.pixels_per_amp = BASE_PIXELS_PER_AMP
         
+        self.fonts = FontRegistry(self.assets)
+        self.text_cache = TextCache()
         self.font_main = None
         self.font_small = None
         
-        self.original_img = None
-        self.scaled_img = None
-        self.img_loaded = False
-        
-        try:
-            img_path = resource_path("3fas.jpg")
-            if os.path.exists(img_path):
-                self.original_img = pygame.image.load(img_path)
-                self.img_loaded = True
-            else:
-                # Försök ladda direkt om path strular på webben
-                self.original_img = pygame.image.load("3fas.jpg")
-                self.img_loaded = True
-        except Exception as e:
-            print(f"Kunde inte ladda bild: {e}")
+        # The image is loaded and scaled on first draw (see diagram_image)
+        self.img_path = resource_path("3fas.jpg")
+        if not os.path.exists(self.img_path):
+            # Försök ladda direkt om path strular på webben
+            self.img_path = "3fas.jpg"
+        self.img_target = (0, 0)
 
         self.sliders_delta = [ # By AI agent Mima 2026-02-05 19:20:00
             Slider((0, 3000), 0, "P12 (L1—L2)", COLOR_P12_LABEL), # Removed is_italic=True # By AI agent Mima 2026-02-05 19:20:00
@@ -152,12 +354,37 @@ class ThreePhaseSim:
             Slider((0, 2000), 0, "P3 (L3—N)", COLOR_L3)  # Removed is_italic=True # By AI agent Mima 2026-02-05 19:20:00
         ]
         
+        # Set by FrameScheduler when the frame budget is exceeded
+        self.sine_step_factor = 1
+        self.dashed_lines = True
+
+        # Oscilloscope mode (key O): scrolling trace of sampled history
+        self.scope_mode = False
+        self.scope_history = None
+        self.scope_geometry = None
+        self.scope_phase = 0.0 # Simulation time of the newest sample
+        self.scope_pending = 0 # Samples not yet drawn on scope_surface
+        self.scope_surface = None
+
         self.reset_rect = pygame.Rect(0, 0, 100, 40)
         self.stop_rect = pygame.Rect(0, 0, 100, 40)
+        # Mouse and touch input, routed through a hit-test index built in update_layout
+        self.dispatcher = InputDispatcher()
+        self.reset_button = Button(self.reset_loads)
+        self.stop_button = Button(self.toggle_pause)
         
         self.update_layout(width, height)
         self.line_currents_data = [(0.0, 0.0), (0.0, 0.0), (0.0, 0.0)] 
         self.neutral_current_data = (0.0, 0.0)
+        # Currents only change with the sliders or the scale
+        self.currents_key = None
+        self.currents_calls = 0
+        self.currents_recomputes = 0
+        # Precomputed operating points (tools/build_lut.py), if present
+        self.op_table = None
+        if os.path.exists(resource_path(OP_TABLE_FILE)):
+            import oplut # Only needed when the table exists
+            self.op_table = oplut.OperatingPointTable.open(resource_path(OP_TABLE_FILE))
 
     def update_layout(self, w, h):
         self.w = w
@@ -167,22 +394,15 @@ class ThreePhaseSim:
         self.scale = min(scale_w, scale_h)
         self.pixels_per_amp = BASE_PIXELS_PER_AMP * self.scale
         
-        main_font_size = max(12, int(18 * self.scale))
-        small_font_size = max(10, int(20 * self.scale))
-        heading_font_size = max(12, int(25 * self.scale)) # New font size for headings # By AI agent Mima 2026-02-05 19:07:00
-
-        self.font_main = pygame.font.SysFont("Arial", main_font_size)
-        self.font_small = pygame.font.SysFont("Arial", small_font_size) # Removed italic, will handle for specific text # By AI agent Mima 2026-02-05 19:07:00
-        self.font_heading = pygame.font.SysFont("Arial", heading_font_size, italic=True) # New font for headings, italic # By AI agent Mima 2026-02-05 19:07:00
+        if self.fonts.resolve(self.scale):
+            # Cached surfaces belong to the old fonts
+            self.text_cache.clear()
+        self.font_main = self.fonts.main
+        self.font_small = self.fonts.small
+        self.font_heading = self.fonts.heading # Italic heading font # By AI agent Mima 2026-02-05 19:07:00
         
-        if self.img_loaded:
-            target_w = w // 2 - int(50 * self.scale)
-            target_h = h // 2 - int(80 * self.scale)
-            img_rect = self.original_img.get_rect()
-            scale_ratio = min(target_w / img_rect.width, target_h / img_rect.height)
-            new_size = (int(img_rect.width * scale_ratio), int(img_rect.height * scale_ratio))
-            self.scaled_img = pygame.transform.scale(self.original_img, new_size)
-            
+        self.img_target = (w // 2 - int(50 * self.scale), h // 2 - int(80 * self.scale))
+
         area_start_x = w // 2 + int(20 * self.scale)
         area_width = w // 2 - int(40 * self.scale)
         col_width = (area_width - int(40 * self.scale)) // 2
@@ -201,10 +421,24 @@ class ThreePhaseSim:
         btn_w = int(120 * self.scale)
         btn_h = int(40 * self.scale)
         self.reset_rect = pygame.Rect(x_col2, slider_start_y + 3 * gap, btn_w, btn_h)
+        self.dash_cache = {}
         self.stop_rect = pygame.Rect(w // 2 - btn_w - int(20 * self.scale), h - int(60 * self.scale), btn_w, btn_h) # Moved left # By AI agent Mima 2026-02-05 19:25:00
+        self.dispatcher.rebuild([(s.hit_rect(), s) for s in self.sliders_y + self.sliders_delta]
+                                + [(self.reset_rect, self.reset_button), (self.stop_rect, self.stop_button)])
+
+    def reset_loads(self):
+        for s in self.sliders_y: s.val = 0.0
+        for s in self.sliders_delta: s.val = 0.0
+
+    def toggle_pause(self):
+        if self.paused:
+            self.paused = False
+        else:
+            self.paused = True
+            self.time = 0.0
 
     def update(self, events):
-        current_time = time.time() # By AI agent Mima 2026-02-05 17:10:10
+        current_time = self.clock.now() # By AI agent Mima 2026-02-05 17:10:10
         dt = current_time - self.last_update_time # By AI agent Mima 2026-02-05 17:10:10
         self.last_update_time = current_time # By AI agent Mima 2026-02-05 17:10:10
 
@@ -213,91 +447,92 @@ class ThreePhaseSim:
             self.time += self.current_freq * dt # By AI agent Mima 2026-02-05 17:10:10
             self.current_freq = min(self.current_freq, self.max_freq) # By AI agent Mima 2026-02-05 17:10:10
             
-        mx, my = pygame.mouse.get_pos()
+        self.mouse = self.input.mouse_pos()
+        self.dispatcher.dispatch(events, self.mouse, (self.w, self.h))
         for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if self.reset_rect.collidepoint(mx, my):
-                    for s in self.sliders_y: s.val = 0.0
-                    for s in self.sliders_delta: s.val = 0.0
-                if self.stop_rect.collidepoint(mx, my):
-                    if self.paused:
-                        self.paused = False
-                    else:
-                        self.paused = True
-                        self.time = 0.0
             if event.type == pygame.VIDEORESIZE:
                 self.update_layout(event.w, event.h)
-                
-        for s in self.sliders_y: s.update(events)
-        for s in self.sliders_delta: s.update(events)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_o:
+                self.scope_mode = not self.scope_mode
+                self.scope_surface = None
+
+        self.profiler.mark("update")
         self.calculate_currents()
+        if self.scope_mode:
+            self.sample_scope()
+        self.profiler.mark("physics")
 
     def calculate_currents(self):
-        u_phase = [cmath.rect(1, 0), cmath.rect(1, -2 * math.pi / 3), cmath.rect(1, -4 * math.pi / 3)]
-        u_line = [cmath.rect(1, math.pi / 6), cmath.rect(1, -math.pi / 2), cmath.rect(1, -7 * math.pi / 6)]
-        
-        i_y = []
-        for i in range(3):
-            p = self.sliders_y[i].val
-            mag = p / VOLTAGE_RMS
-            i_y.append(mag * u_phase[i])
-            
-        u_line_rms = VOLTAGE_RMS * math.sqrt(3)
-        i_d = []
-        for i in range(3):
-            p = self.sliders_delta[i].val
-            mag = p / u_line_rms
-            i_d.append(mag * u_line[i])
-        
-        i_total = [
-            i_y[0] + i_d[0] - i_d[2],
-            i_y[1] + i_d[1] - i_d[0],
-            i_y[2] + i_d[2] - i_d[1]
-        ]
-        
-        self.line_currents_data = []
-        for i_ph in i_total:
-            mag = abs(i_ph)
-            angle = cmath.phase(i_ph)
-            self.line_currents_data.append((mag * self.pixels_per_amp, angle))
-            
-        i_n_vec = (i_total[0] + i_total[1] + i_total[2])
-        self.neutral_current_data = (abs(i_n_vec) * self.pixels_per_amp, cmath.phase(i_n_vec))
+        self.currents_calls += 1
+        p_y = tuple(s.val for s in self.sliders_y)
+        p_delta = tuple(s.val for s in self.sliders_delta)
+        key = (p_y, p_delta, self.pixels_per_amp)
+        if key == self.currents_key:
+            return
+        self.currents_key = key
+        self.currents_recomputes += 1
+
+        row = self.op_table.lookup(p_y, p_delta) if self.op_table else None
+        if row is None:
+            row = physics.currents(p_y, p_delta)
+        ppa = self.pixels_per_amp
+        self.line_currents_data = [(row[0] * ppa, row[1]), (row[2] * ppa, row[3]), (row[4] * ppa, row[5])]
+        self.neutral_current_data = (row[6] * ppa, row[7])
+
+    def currents_stats(self):
+        """Antal anrop av calculate_currents och hur många som räknade om."""
+        return {'calls': self.currents_calls, 'recomputes': self.currents_recomputes}
+
+    def render_text(self, text, font, color):
+        return self.text_cache.render(text, font, color)
 
     def draw_button(self, surface, rect, text):
-        mx, my = pygame.mouse.get_pos()
+        mx, my = self.mouse
         col = COLOR_BTN_HOVER if rect.collidepoint(mx, my) else COLOR_BTN
         border_radius = int(5 * self.scale)
         pygame.draw.rect(surface, col, rect, border_radius=border_radius)
         pygame.draw.rect(surface, (150, 150, 150), rect, max(1, int(2 * self.scale)), border_radius=border_radius)
-        txt = self.font_main.render(text, True, COLOR_TEXT)
+        txt = self.render_text(text, self.font_main, COLOR_TEXT)
         surface.blit(txt, (rect.centerx - txt.get_width()//2, rect.centery - txt.get_height()//2))
 
+    def diagram_image(self):
+        """Kopplingsschemat skalat till aktuell layout, eller None om bilden saknas."""
+        if min(self.img_target) <= 0:
+            return None
+        return self.assets.scaled_image(self.img_path, *self.img_target)
+
     def draw_circuit_section(self, surface):
-        title = self.font_main.render(f"Kopplingsschema (Ueff = {int(VOLTAGE_RMS)} V)", True, (150, 150, 150))
+        title = self.render_text(f"Kopplingsschema (Ueff = {int(VOLTAGE_RMS)} V)", self.font_main, (150, 150, 150))
         surface.blit(title, (int(20 * self.scale), int(20 * self.scale)))
-        if self.img_loaded and self.scaled_img:
+        scaled_img = self.diagram_image()
+        if scaled_img:
             area_w = self.w // 2
             area_h = self.h // 2
-            img_x = (area_w - self.scaled_img.get_width()) // 2
-            img_y = (area_h - self.scaled_img.get_height()) // 2 + int(20 * self.scale)
-            surface.blit(self.scaled_img, (img_x, img_y))
+            img_x = (area_w - scaled_img.get_width()) // 2
+            img_y = (area_h - scaled_img.get_height()) // 2 + int(20 * self.scale)
+            surface.blit(scaled_img, (img_x, img_y))
         else:
-            msg = self.font_main.render("Bild saknas", True, (255, 100, 100))
+            msg = self.render_text("Bild saknas", self.font_main, (255, 100, 100))
             surface.blit(msg, (int(100 * self.scale), int(100 * self.scale)))
 
     def draw_controls_section(self, surface):
-        title = self.font_main.render("Justera belastning", True, (150, 150, 150))
+        self.draw_controls_static(surface)
+        self.draw_controls_dynamic(surface)
+
+    def draw_controls_static(self, surface):
+        title = self.render_text("Justera belastning", self.font_main, (150, 150, 150))
         surface.blit(title, (self.w // 2 + int(20 * self.scale), int(20 * self.scale)))
         col1_x = self.sliders_delta[0].rect.x
         col2_x = self.sliders_y[0].rect.x
         DELTA = "\u0394"
-        head1 = self.font_heading.render(f"Huvudspänning ({DELTA})", True, (180, 180, 180)) # Use new heading font # By AI agent Mima 2026-02-05 19:10:00
-        head2 = self.font_heading.render("Fasspänning (Y)", True, (180, 180, 180)) # Use new heading font # By AI agent Mima 2026-02-05 19:10:00
+        head1 = self.render_text(f"Huvudspänning ({DELTA})", self.font_heading, (180, 180, 180)) # Use new heading font # By AI agent Mima 2026-02-05 19:10:00
+        head2 = self.render_text("Fasspänning (Y)", self.font_heading, (180, 180, 180)) # Use new heading font # By AI agent Mima 2026-02-05 19:10:00
         surface.blit(head1, (col1_x, int(60 * self.scale)))
         surface.blit(head2, (col2_x, int(60 * self.scale)))
-        for s in self.sliders_delta: s.draw(surface, self.font_main)
-        for s in self.sliders_y: s.draw(surface, self.font_main)
+
+    def draw_controls_dynamic(self, surface):
+        for s in self.sliders_delta: s.draw(surface, self.fonts, self.text_cache)
+        for s in self.sliders_y: s.draw(surface, self.fonts, self.text_cache)
         self.draw_button(surface, self.reset_rect, "Reset (0 W)")
 
     def draw_arrow(self, surface, color, start, end, width=3, head_size=15):
@@ -314,42 +549,79 @@ class ThreePhaseSim:
         p3 = (end[0] - scaled_head * math.cos(angle + arrow_angle), end[1] - scaled_head * math.sin(angle + arrow_angle))
         pygame.draw.polygon(surface, color, [p1, p2, p3])
 
+    def dash_pattern(self, dash_len, gap_len):
+        """(början, slut)-avstånd för alla streck upp till fönstrets diagonal, per skala."""
+        key = ("pattern", dash_len, gap_len)
+        pattern = self.dash_cache.get(key)
+        if pattern is None:
+            max_len = math.hypot(self.w, self.h)
+            period = max(1, dash_len + gap_len)
+            pattern = [(d, d + dash_len) for d in range(0, int(max_len) + period, period)]
+            self.dash_cache[key] = pattern
+        return pattern
+
+    def dash_strip(self, color, dash_len, gap_len, scaled_width):
+        """Förritad horisontell streckad linje i fönstrets bredd, per skala och färg."""
+        key = ("strip", color, dash_len, gap_len, scaled_width)
+        strip = self.dash_cache.get(key)
+        if strip is None:
+            y = scaled_width
+            strip = pygame.Surface((self.w + dash_len + 1, 2 * scaled_width + 1), pygame.SRCALPHA)
+            for a, b in self.dash_pattern(dash_len, gap_len):
+                if a > self.w:
+                    break
+                pygame.draw.line(strip, color, (a, y), (b, y), scaled_width)
+            self.dash_cache[key] = strip
+        return strip
+
     def draw_dashed_line(self, surface, color, start, end, width=1):
         scaled_width = max(1, int(width * self.scale))
         dx = end[0] - start[0]
         dy = end[1] - start[1]
         dist = math.hypot(dx, dy)
-        angle = math.atan2(dy, dx)
+        if dist == 0:
+            return
         dash_len = int(5 * self.scale)
         gap_len = int(5 * self.scale)
-        curr_dist = 0
-        while curr_dist < dist:
-            p_start = (start[0] + math.cos(angle) * curr_dist, start[1] + math.sin(angle) * curr_dist)
-            p_end = (start[0] + math.cos(angle) * min(curr_dist + dash_len, dist), 
-                     start[1] + math.sin(angle) * min(curr_dist + dash_len, dist))
-            pygame.draw.line(surface, color, p_start, p_end, scaled_width)
-            curr_dist += dash_len + gap_len
+        ux = dx / dist
+        uy = dy / dist
+        x0, y0 = start
+        line = pygame.draw.line
+        for a, b in self.dash_pattern(dash_len, gap_len):
+            if a >= dist:
+                break
+            if b > dist:
+                b = dist
+            line(surface, color, (x0 + ux * a, y0 + uy * a), (x0 + ux * b, y0 + uy * b), scaled_width)
 
     def draw_horizontal_dashed_line(self, surface, color, start_x, end_x, y, width=1):
         if end_x < start_x: start_x, end_x = end_x, start_x
         dash_len = int(4 * self.scale)
         gap_len = int(4 * self.scale)
         scaled_width = max(1, int(width * self.scale))
-        curr_x = start_x
-        while curr_x < end_x:
-            next_x = min(curr_x + dash_len, end_x)
-            pygame.draw.line(surface, color, (curr_x, y), (next_x, y), scaled_width)
-            curr_x += dash_len + gap_len
+        # One blit of the cached strip, cut to the line's length
+        strip = self.dash_strip(color, dash_len, gap_len, scaled_width)
+        length = int(end_x) - int(start_x) + 1
+        surface.blit(strip, (int(start_x), int(y) - scaled_width), (0, 0, length, strip.get_height()))
 
     def draw_phasor_diagram(self, surface):
+        self.draw_phasor_static(surface)
+        self.draw_phasor_dynamic(surface)
+
+    def draw_phasor_static(self, surface):
         cx = self.w // 4
         cy = int(self.h * 0.75)
-        sine_axis_x = self.w // 2 + int(80 * self.scale)
-        title = self.font_main.render("Visardiagram", True, (150, 150, 150))
+        title = self.render_text("Visardiagram", self.font_main, (150, 150, 150))
         surface.blit(title, (int(20 * self.scale), self.h // 2 + int(20 * self.scale)))
         axis_len = int(100 * self.scale)
         pygame.draw.line(surface, COLOR_AXIS, (cx - axis_len, cy), (cx + axis_len, cy), 1)
         pygame.draw.line(surface, COLOR_AXIS, (cx, cy - axis_len), (cx, cy + axis_len), 1)
+
+    def draw_phasor_dynamic(self, surface):
+        cx = self.w // 4
+        cy = int(self.h * 0.75)
+        sine_axis_x = self.w // 2 + int(80 * self.scale)
+        axis_len = int(100 * self.scale)
         phase_offsets = [0, math.radians(120), math.radians(240)] 
         colors = [COLOR_L1, COLOR_L2, COLOR_L3]
         e_labels = ["e1", "e2", "e3"]
@@ -360,10 +632,11 @@ class ThreePhaseSim:
             vy_e = -axis_len * math.sin(theta_e)
             end_x_e = cx + vx_e
             end_y_e = cy + vy_e
-            self.draw_dashed_line(surface, COLOR_N, (cx, cy), (end_x_e, end_y_e), width=1)
+            if self.dashed_lines:
+                self.draw_dashed_line(surface, COLOR_N, (cx, cy), (end_x_e, end_y_e), width=1)
             lbl_x = end_x_e + (20 * self.scale) * math.cos(theta_e)
             lbl_y = end_y_e - (20 * self.scale) * math.sin(theta_e)
-            lbl = self.font_small.render(e_labels[i], True, COLOR_N)
+            lbl = self.render_text(e_labels[i], self.font_small, COLOR_N)
             surface.blit(lbl, (lbl_x - lbl.get_width()//2, lbl_y - lbl.get_height()//2))
 
         sum_mag = 0
@@ -383,25 +656,30 @@ class ThreePhaseSim:
             vy_n = -n_mag * math.sin(theta_n)
             self.draw_arrow(surface, COLOR_N, (cx, cy), (cx + vx_n, cy + vy_n), width=4)
             in_amp = n_mag / self.pixels_per_amp 
-            label_n = self.font_main.render(f"iN: {in_amp:.1f} A", True, COLOR_N)
+            label_n = self.render_text(f"iN: {in_amp:.1f} A", self.font_main, COLOR_N)
             surface.blit(label_n, (cx + vx_n + 10, cy + vy_n))
 
         for i in range(3):
             vx, vy = vectors[i]
             end_x = cx + vx
             end_y = cy + vy
-            self.draw_horizontal_dashed_line(surface, colors[i], end_x, sine_axis_x, end_y, width=1)
+            if self.dashed_lines:
+                self.draw_horizontal_dashed_line(surface, colors[i], end_x, sine_axis_x, end_y, width=1)
             self.draw_arrow(surface, colors[i], (cx, cy), (end_x, end_y), width=3)
             
         btn_text = "Start" if self.paused else "Stopp (t=0)"
         self.draw_button(surface, self.stop_rect, btn_text)
 
     def draw_sine_waves(self, surface):
+        self.draw_sine_static(surface)
+        self.draw_sine_dynamic(surface)
+
+    def draw_sine_static(self, surface):
         offset_x = self.w // 2 + int(80 * self.scale)
         offset_y = int(self.h * 0.75)
         width = self.w // 2 - int(120 * self.scale)
         height_scale = int(150 * self.scale)
-        title = self.font_main.render("Momentanvärden", True, (150, 150, 150))
+        title = self.render_text("Momentanvärden", self.font_main, (150, 150, 150))
         surface.blit(title, (offset_x, self.h // 2 + int(20 * self.scale)))
         pygame.draw.line(surface, COLOR_AXIS, (offset_x, offset_y), (offset_x + width, offset_y), 1)
         pygame.draw.line(surface, COLOR_AXIS, (offset_x, offset_y - height_scale), (offset_x, offset_y + height_scale), 1)
@@ -413,25 +691,93 @@ class ThreePhaseSim:
             if offset_y - height_scale <= y_pos <= offset_y + height_scale:
                 pygame.draw.line(surface, (80, 80, 80), (offset_x, y_pos), (offset_x + width, y_pos), 1)
                 txt_x = offset_x + int(5 * self.scale) # Moved closer to y-axis and right-aligned # By AI agent Mima 2026-02-05 19:28:00
-                lbl = self.font_small.render(f"{amp} A", True, (255, 255, 255)) # Right-adjusted with space before A # By AI agent Mima 2026-02-05 19:10:00
+                lbl = self.render_text(f"{amp} A", self.font_small, (255, 255, 255)) # Right-adjusted with space before A # By AI agent Mima 2026-02-05 19:10:00
                 surface.blit(lbl, (txt_x, y_pos - int(8 * self.scale))) # By AI agent Mima 2026-02-05 19:10:00
 
-        colors = [COLOR_L1, COLOR_L2, COLOR_L3]
-        points_lists = [[], [], [], []] 
+    def scope_layout(self):
+        offset_x = self.w // 2 + int(80 * self.scale)
+        offset_y = int(self.h * 0.75)
+        width = self.w // 2 - int(120 * self.scale)
         step = max(2, int(2 * self.scale))
-        
-        for x in range(0, width, step):
-            t_offset = x * 0.05
-            sum_y_val = 0
-            for i in range(3):
-                mag_px, angle_rad = self.line_currents_data[i]
-                theta = self.time + t_offset + angle_rad
-                y_val = mag_px * math.sin(theta)
-                points_lists[i].append((offset_x + x, offset_y - y_val))
-            n_mag, n_angle = self.neutral_current_data
-            theta_n = self.time + t_offset + n_angle
-            y_val_n = n_mag * math.sin(theta_n)
-            points_lists[3].append((offset_x + x, offset_y - y_val_n))
+        return offset_x, offset_y, width, step
+
+    def sample_scope(self):
+        """Lägger till sampel för simuleringstiden sedan förra anropet."""
+        geometry = self.scope_layout()
+        offset_x, offset_y, width, step = geometry
+        if geometry != self.scope_geometry:
+            self.scope_geometry = geometry
+            self.scope_history = WaveformHistory(width // step + 1)
+            self.scope_phase = self.time
+            self.scope_surface = None
+        history = self.scope_history
+        if self.time < self.scope_phase: # Restarted at t=0
+            history.clear()
+            self.scope_phase = self.time
+            self.scope_surface = None
+
+        sample_dt = step * SINE_T_PER_PX
+        n_new = int((self.time - self.scope_phase) / sample_dt)
+        if n_new <= 0:
+            return
+        # Older samples than the buffer holds would be overwritten anyway
+        skip = max(0, n_new - history.capacity)
+        ppa = self.pixels_per_amp
+        phasors = [(m / ppa, a) for m, a in list(self.line_currents_data) + [self.neutral_current_data]]
+        for k in range(skip + 1, n_new + 1):
+            theta = self.scope_phase + k * sample_dt
+            history.append([amp * math.sin(theta + angle) for amp, angle in phasors])
+        self.scope_phase += n_new * sample_dt
+        self.scope_pending += n_new - skip
+
+    def draw_scope(self, surface):
+        offset_x, offset_y, width, step = self.scope_layout()
+        history = self.scope_history
+        if history is None or history.count < 2:
+            return
+        colors = [COLOR_L1, COLOR_L2, COLOR_L3, COLOR_N]
+        widths = [max(2, int(2 * self.scale))] * 3 + [max(3, int(3 * self.scale))]
+        order = [3, 0, 1, 2] # Neutral below the phases, as in draw_sine_waves
+        ppa = self.pixels_per_amp
+        right = (history.capacity - 1) * step # Newest sample's x on scope_surface
+
+        if self.scope_surface is None or self.scope_pending >= history.count:
+            # Full redraw from the ring buffer (after resize or mode switch)
+            self.scope_surface = pygame.Surface((right + step, self.h))
+            self.scope_surface.set_colorkey((0, 0, 0))
+            start_x = right - (history.count - 1) * step
+            for ch in order:
+                values = history.channel(ch)
+                points = [(start_x + k * step, offset_y - v * ppa) for k, v in enumerate(values)]
+                pygame.draw.lines(self.scope_surface, colors[ch], False, points, widths[ch])
+        elif self.scope_pending:
+            # Scroll and draw only the new segments at the right edge
+            n = self.scope_pending
+            shift = n * step
+            self.scope_surface.scroll(-shift, 0)
+            # Clear only the columns the scroll left behind
+            self.scope_surface.fill((0, 0, 0), (self.scope_surface.get_width() - shift, 0, shift, self.h))
+            for ch in order:
+                values = history.latest(ch, n + 1)
+                start_x = right - (len(values) - 1) * step
+                points = [(start_x + k * step, offset_y - v * ppa) for k, v in enumerate(values)]
+                pygame.draw.lines(self.scope_surface, colors[ch], False, points, widths[ch])
+        self.scope_pending = 0
+
+        # Newest sample at the right end of the time axis
+        surface.blit(self.scope_surface, (offset_x + width - right, 0))
+
+    def draw_sine_dynamic(self, surface):
+        if self.scope_mode:
+            self.draw_scope(surface)
+            return
+        offset_x = self.w // 2 + int(80 * self.scale)
+        offset_y = int(self.h * 0.75)
+        width = self.w // 2 - int(120 * self.scale)
+        colors = [COLOR_L1, COLOR_L2, COLOR_L3]
+        step = max(2, int(2 * self.scale)) * self.sine_step_factor
+        phasors = list(self.line_currents_data) + [self.neutral_current_data]
+        points_lists = sine_traces(phasors, self.time, offset_x, offset_y, width, step)
 
         scaled_line_width = max(2, int(2 * self.scale))
         neutral_width = max(3, int(3 * self.scale))
@@ -441,41 +787,263 @@ class ThreePhaseSim:
             if len(points_lists[i]) > 1:
                 pygame.draw.lines(surface, colors[i], False, points_lists[i], scaled_line_width)
 
-async def main():
+class LayeredRenderer:
+    """Ritar bara det som ändrats sedan förra bilden.
+
+    Bakgrund, avdelare, kopplingsschema, rubriker, axlar och skalstreck
+    ritas en gång till ett statiskt lager som byggs om vid storleksändring.
+    Varje bild återställs och ritas bara de områden vars innehåll ändrats.
+    """
+    def __init__(self, sim):
+        self.sim = sim
+        self.static_layer = None
+        self.controls_key = None
+        self.bottom_key = None
+        self.bottom_rect = None
+
+    def invalidate(self):
+        self.static_layer = None
+
+    def build_static_layer(self, size):
+        sim = self.sim
+        w, h = size
+        layer = pygame.Surface(size).convert()
+        layer.fill(COLOR_BG)
+        pygame.draw.line(layer, (40, 40, 50), (w//2, 0), (w//2, h), 2)
+        pygame.draw.line(layer, (40, 40, 50), (0, h//2), (w, h//2), 2)
+        sim.draw_circuit_section(layer)
+        sim.draw_controls_static(layer)
+        sim.draw_phasor_static(layer)
+        sim.draw_sine_static(layer)
+        self.static_layer = layer
+
+    def controls_region(self):
+        sim = self.sim
+        rect = pygame.Rect(sim.w // 2 + 1, 0, sim.w - sim.w // 2 - 1, sim.h // 2)
+        return rect.union(sim.reset_rect.inflate(4, 4))
+
+    def bottom_region(self):
+        # Phasors and traces may reach above the bottom half for large currents
+        sim = self.sim
+        max_mag = max([m for m, _ in sim.line_currents_data] + [sim.neutral_current_data[0]])
+        reach = int(max_mag + 40 * sim.scale)
+        top = max(0, min(sim.h // 2, int(sim.h * 0.75) - reach))
+        return pygame.Rect(0, top, sim.w, sim.h - top)
+
+    def sine_region(self, bottom_rect):
+        sim = self.sim
+        offset_x = sim.w // 2 + int(80 * sim.scale)
+        width = sim.w // 2 - int(120 * sim.scale)
+        pad = max(3, int(3 * sim.scale)) + max(2, int(2 * sim.scale)) * sim.sine_step_factor
+        return pygame.Rect(offset_x - pad, bottom_rect.top, width + 2 * pad, bottom_rect.height)
+
+    def sections(self):
+        """(område, ritfunktion, profilsektion) för de dynamiska delarna."""
+        sim = self.sim
+        return ((self.controls_region(), sim.draw_controls_dynamic, "draw_controls"),
+                (self.bottom_rect, sim.draw_phasor_dynamic, "draw_phasor"),
+                (self.sine_region(self.bottom_rect), sim.draw_sine_dynamic, "draw_sine"))
+
+    def draw_dynamic(self, surface, rects=None):
+        """Ritar de dynamiska delarna; med rects bara in i de rektanglar varje del når."""
+        prof = self.sim.profiler
+        for region, draw, name in self.sections():
+            if rects is None:
+                draw(surface)
+            else:
+                for rect in rects:
+                    if region.colliderect(rect):
+                        surface.set_clip(rect)
+                        draw(surface)
+                surface.set_clip(None)
+            prof.mark(name)
+
+    def render(self, screen, extra_rects=()):
+        """Ritar en bild och returnerar listan av ändrade rektanglar.
+
+        extra_rects återställs och ritas om även om inget ändrats där,
+        t.ex. under en overlay.
+        """
+        sim = self.sim
+        size = screen.get_size()
+        mouse = sim.mouse
+        controls_key = (tuple(s.val for s in sim.sliders_delta + sim.sliders_y),
+                        sim.reset_rect.collidepoint(mouse))
+        bottom_key = (sim.time, sim.paused, tuple(sim.line_currents_data),
+                      sim.neutral_current_data, sim.stop_rect.collidepoint(mouse),
+                      sim.sine_step_factor, sim.dashed_lines, sim.scope_mode)
+
+        if self.static_layer is None or self.static_layer.get_size() != size:
+            self.build_static_layer(size)
+            sim.profiler.mark("draw_static")
+            screen.blit(self.static_layer, (0, 0))
+            self.controls_key = controls_key
+            self.bottom_key = bottom_key
+            self.bottom_rect = self.bottom_region()
+            self.draw_dynamic(screen)
+            return [screen.get_rect()]
+
+        dirty = []
+        if controls_key != self.controls_key:
+            self.controls_key = controls_key
+            dirty.append(self.controls_region())
+        if bottom_key != self.bottom_key:
+            self.bottom_key = bottom_key
+            bottom_rect = self.bottom_region()
+            dirty.append(bottom_rect.union(self.bottom_rect))
+            self.bottom_rect = bottom_rect
+        # Merge overlapping rects so no section is drawn twice over the same pixels
+        dirty.extend(pygame.Rect(rect) for rect in extra_rects)
+        merged = []
+        for rect in dirty:
+            hits = rect.collidelistall(merged)
+            while hits:
+                for i in reversed(hits):
+                    rect = rect.union(merged.pop(i))
+                hits = rect.collidelistall(merged)
+            merged.append(rect)
+        dirty = merged
+
+        # Restore every rect first, then draw each section only where it is dirty
+        for rect in dirty:
+            screen.blit(self.static_layer, rect, rect)
+        sim.profiler.mark("restore")
+        self.draw_dynamic(screen, dirty)
+        return dirty
+
+class FrameScheduler:
+    """Håller bildfrekvensen och sänker kvaliteten när bilderna tar för lång tid.
+
+    wait() sover (asynkront, så webbläsaren får tiden) till nästa bild.
+    Utan indata på IDLE_TIMEOUT sekunder (PAUSED_IDLE_TIMEOUT när
+    simuleringen är pausad) används idle_fps i stället för target_fps.
+    """
+    def __init__(self, sim, target_fps=TARGET_FPS, idle_fps=IDLE_FPS, idle_timeout=IDLE_TIMEOUT,
+                 paused_idle_timeout=PAUSED_IDLE_TIMEOUT):
+        self.sim = sim
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self.idle_timeout = idle_timeout
+        self.paused_idle_timeout = paused_idle_timeout
+        self.frame_start = time.perf_counter()
+        self.last_input = self.frame_start
+        self.work_avg = 0.0 # Smoothed work time per frame (s)
+        self.quality = 0
+        self.idle = False
+
+    def start_frame(self, events):
+        self.frame_start = time.perf_counter()
+        if events:
+            self.last_input = self.frame_start
+
+    def frame_interval(self):
+        timeout = self.paused_idle_timeout if self.sim.paused else self.idle_timeout
+        self.idle = self.frame_start - self.last_input > timeout
+        return 1.0 / (self.idle_fps if self.idle else self.target_fps)
+
+    def adapt_quality(self, work):
+        self.work_avg += 0.1 * (work - self.work_avg)
+        budget = 1.0 / self.target_fps
+        level = self.quality
+        if self.work_avg > budget and level < len(QUALITY_LEVELS) - 1:
+            level += 1
+        elif self.work_avg < 0.5 * budget and level > 0:
+            level -= 1
+        if level != self.quality:
+            self.quality = level
+            # Start over so the new level gets measured before changing again
+            self.work_avg = 0.75 * budget
+            self.sim.sine_step_factor, self.sim.dashed_lines = QUALITY_LEVELS[level]
+
+    async def wait(self):
+        now = time.perf_counter()
+        self.adapt_quality(now - self.frame_start)
+        # Always yield at least once; the browser needs it
+        await asyncio.sleep(max(0.0, self.frame_start + self.frame_interval() - now))
+
+def init_headless(width=1200, height=800):
+    """Startar pygame utan fönster (SDL dummy) och returnerar en offscreen-yta.
+
+    För benchmarks och CI utan skärm eller GPU.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1)) # Needed for Surface.convert()
+    return pygame.Surface((width, height))
+
+async def main(profile=False, profile_dump=None, fps=TARGET_FPS, idle_fps=IDLE_FPS, record=None):
     pygame.init()
     screen = pygame.display.set_mode((1200, 800), pygame.RESIZABLE)
     pygame.display.set_caption("Trefas-simulator: Y-koppling")
-    clock = pygame.time.Clock()
     
-    sim = ThreePhaseSim(1200, 800)
+    # F3 toggles the performance overlay (and turns profiling on)
+    profiler = FrameProfiler(enabled=profile or bool(profile_dump), target_fps=fps)
+    overlay_font = None # Created the first time the overlay is shown
+    overlay_rect = None
+    sim = ThreePhaseSim(1200, 800, profiler)
+    renderer = LayeredRenderer(sim)
+    scheduler = FrameScheduler(sim, fps, idle_fps)
+    # Session recording for replay (python session.py FILE)
+    recorder = None
+    if record:
+        from session import SessionRecorder
+        recorder = SessionRecorder(record, 1200, 800)
     
     running = True
+    first_frame = True
     while running:
+        profiler.start_frame()
         events = pygame.event.get()
+        scheduler.start_frame(events)
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
         
-        sim.update(events)
-        
-        screen.fill(COLOR_BG)
+            if event.type == pygame.VIDEORESIZE:
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+        profiler.mark("events")
         
-        w, h = screen.get_size()
-        pygame.draw.line(screen, (40, 40, 50), (w//2, 0), (w//2, h), 2)
-        pygame.draw.line(screen, (40, 40, 50), (0, h//2), (w, h//2), 2)
+        sim.update(events)
+        if recorder:
+            recorder.record_frame(sim.last_update_time, sim.mouse, events,
+                                  [s.val for s in sim.sliders_delta + sim.sliders_y])
         
-        sim.draw_circuit_section(screen)
-        sim.draw_controls_section(screen)
-        sim.draw_phasor_diagram(screen)
-        sim.draw_sine_waves(screen)
-
-        pygame.display.flip()
+        # Restore what the overlay covered last frame
+        dirty_rects = renderer.render(screen, [overlay_rect] if overlay_rect else [])
+        if profiler.overlay_visible and overlay_font is None:
+            overlay_font = sim.assets.font("monospace", 14)
+        overlay_rect = profiler.draw_overlay(screen, overlay_font)
+        if overlay_rect:
+            dirty_rects.append(overlay_rect)
+        profiler.mark("overlay")
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        if first_frame:
+            first_frame = False
+            mark_interactive()
+        profiler.mark("flip")
         
-        # VIKTIGT FÖR WEBBEN: yield control to browser
-        await asyncio.sleep(0)
+        # VIKTIGT FÖR WEBBEN: yield control to browser (until the next frame is due)
+        await scheduler.wait()
+        profiler.mark("yield")
+        profiler.end_frame()
         
+    if profile_dump:
+        profiler.dump(profile_dump)
+    if recorder:
+        recorder.close()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Trefas-simulator")
+    parser.add_argument("--profile", action="store_true", help="measure frame times from the start")
+    parser.add_argument("--profile-dump", metavar="PATH", help="write frame statistics on exit (.json or .csv)")
+    parser.add_argument("--fps", type=float, default=TARGET_FPS, help="target frame rate")
+    parser.add_argument("--idle-fps", type=float, default=IDLE_FPS, help="frame rate when paused or idle")
+    parser.add_argument("--record", metavar="PATH", help="record the session for replay (.gz compresses)")
+    args, _ = parser.parse_known_args()
+    asyncio.run(main(args.profile, args.profile_dump, args.fps, args.idle_fps, args.record))
\ No newline at end of file
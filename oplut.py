@@ -0,0 +1,125 @@
+"""Förberäknad tabell över driftpunkter (operating points).
+
+Tabellen innehåller strömmar för alla kombinationer av de sex effekterna
+på ett rutnät (p_y i 0..y_max, p_delta i 0..delta_max med givna steg).
+Filen är struct-of-arrays i float32: ett huvud följt av åtta kolumner
+(magnitud och vinkel för L1, L2, L3 och N), så att en uppslagning bara är
+en indexberäkning i en minnesmappad fil.
+
+Skapa filen med tools/build_lut.py.
+"""
+import mmap
+import os
+import struct
+
+import physics
+
+MAGIC = b"3FASLUT1"
+HEADER = struct.Struct("<8s4fQ") # magic, y_max, y_step, delta_max, delta_step, count
+FIELDS = 8 # (magnitude, angle) for L1, L2, L3 and N
+DEFAULT_PATH = "operating_points.lut"
+
+
+def grid_size(y_max, y_step, delta_max, delta_step):
+    """Antal punkter i rutnätet."""
+    n_y = int(round(y_max / y_step)) + 1
+    n_d = int(round(delta_max / delta_step)) + 1
+    return n_y ** 3 * n_d ** 3
+
+
+def write_table(path, y_max=2000.0, y_step=500.0, delta_max=3000.0, delta_step=500.0):
+    """Beräknar hela rutnätet med numpy och skriver det till path."""
+    import numpy as np
+
+    n_y = int(round(y_max / y_step)) + 1
+    n_d = int(round(delta_max / delta_step)) + 1
+    count = n_y ** 3 * n_d ** 3
+    y_vals = np.arange(n_y) * y_step
+    d_vals = np.arange(n_d) * delta_step
+
+    # Index order: p_y1, p_y2, p_y3, p_delta1, p_delta2, p_delta3 (last varies fastest)
+    grids = np.meshgrid(y_vals, y_vals, y_vals, d_vals, d_vals, d_vals, indexing="ij", sparse=True)
+    y_coeff = (physics.Y1, physics.Y2, physics.Y3)
+    d_coeff = (physics.D12, physics.D23, physics.D31)
+    i_y = [grids[i] * y_coeff[i] for i in range(3)]
+    i_d = [grids[3 + i] * d_coeff[i] for i in range(3)]
+
+    columns = []
+    i_n = 0
+    for i in range(3):
+        i_total = np.broadcast_to(i_y[i] + i_d[i] - i_d[i - 1], (n_y,) * 3 + (n_d,) * 3)
+        i_n = i_n + i_total
+        columns += [np.abs(i_total), np.angle(i_total)]
+    columns += [np.abs(i_n), np.angle(i_n)]
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, y_max, y_step, delta_max, delta_step, count))
+        for col in columns:
+            f.write(np.ascontiguousarray(col, dtype="<f4").tobytes())
+    return count
+
+
+class OperatingPointTable:
+    """Minnesmappad tabell. lookup() ger None utanför rutnätet."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError): # No mmap (e.g. in the browser build)
+                self.buf = f.read()
+        magic, self.y_max, self.y_step, self.delta_max, self.delta_step, self.count = HEADER.unpack_from(self.buf)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an operating point table")
+        self.n_y = int(round(self.y_max / self.y_step)) + 1
+        self.n_d = int(round(self.delta_max / self.delta_step)) + 1
+        if len(self.buf) != HEADER.size + FIELDS * 4 * self.count:
+            raise ValueError(f"{path} is truncated")
+        # Columns as a flat float32 view (the file is little-endian, as are all our targets)
+        self.values = memoryview(self.buf)[HEADER.size:].cast("f")
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH):
+        """Öppnar tabellen om filen finns och är giltig, annars None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Kunde inte läsa {path}: {e}")
+            return None
+
+    def index(self, p_y_values, p_delta_values):
+        """Radindex för effekterna, eller None om de ligger utanför rutnätet."""
+        idx = 0
+        n, step = self.n_y, self.y_step
+        for p in p_y_values:
+            k = p / step
+            if k != int(k) or not 0 <= k < n:
+                return None
+            idx = idx * n + int(k)
+        n, step = self.n_d, self.delta_step
+        for p in p_delta_values:
+            k = p / step
+            if k != int(k) or not 0 <= k < n:
+                return None
+            idx = idx * n + int(k)
+        return idx
+
+    def lookup(self, p_y_values, p_delta_values):
+        """(mag1, ang1, mag2, ang2, mag3, ang3, mag_n, ang_n) eller None."""
+        idx = self.index(p_y_values, p_delta_values)
+        if idx is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        v = self.values
+        c = self.count
+        return (v[idx], v[idx + c], v[idx + 2 * c], v[idx + 3 * c],
+                v[idx + 4 * c], v[idx + 5 * c], v[idx + 6 * c], v[idx + 7 * c])
+
+    def file_size(self):
+        return len(self.buf)
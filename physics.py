@@ -0,0 +1,95 @@
+"""Gemensam fysikkärna för de sex resistiva lasterna (pygame och Flask).
+
+Visarna och strömmen per watt räknas ut en gång vid import. Resultatet är
+en rad med åtta flyttal (magnitud och vinkel för L1, L2, L3 och N), samma
+format som driftpunktstabellen (oplut) och /calculate_batch. Negativa
+effekter räknas som 0 W.
+
+    currents(p_y, p_delta)         en rad som tuple
+    currents_cached(p_y, p_delta)  samma, med lru_cache (tupler som argument)
+    currents_batch(p_y, p_delta)   (N, 8)-array för N scenarier
+"""
+import cmath
+import functools
+import math
+
+try:
+    import numpy as np
+except ImportError: # currents_batch falls back to the scalar path
+    np = None
+
+VOLTAGE_RMS = 230.0
+U_LINE_RMS = VOLTAGE_RMS * math.sqrt(3)
+
+# Enhetsvisare för fasspänningar (Y) och huvudspänningar (Δ: U12, U23, U31)
+U_PHASE = (cmath.rect(1, 0), cmath.rect(1, -2 * math.pi / 3), cmath.rect(1, -4 * math.pi / 3))
+U_LINE = (cmath.rect(1, math.pi / 6), cmath.rect(1, -math.pi / 2), cmath.rect(1, -7 * math.pi / 6))
+
+# Current phasor per watt for each load
+Y1, Y2, Y3 = (u / VOLTAGE_RMS for u in U_PHASE)
+D12, D23, D31 = (u / U_LINE_RMS for u in U_LINE)
+
+RESULT_FIELDS = 8 # (magnitude, angle) for L1, L2, L3 and N
+CACHE_SIZE = 4096
+
+_abs = abs
+_phase = cmath.phase
+
+
+def phasors(p_y, p_delta):
+    """Komplexa strömmar (iL1, iL2, iL3, iN) i A."""
+    py1, py2, py3 = p_y
+    pd1, pd2, pd3 = p_delta
+    i_d12 = (pd1 if pd1 > 0 else 0.0) * D12
+    i_d23 = (pd2 if pd2 > 0 else 0.0) * D23
+    i_d31 = (pd3 if pd3 > 0 else 0.0) * D31
+    # iL1 = iY1 + iD12 - iD31, iL2 = iY2 + iD23 - iD12, iL3 = iY3 + iD31 - iD23
+    i1 = (py1 if py1 > 0 else 0.0) * Y1 + i_d12 - i_d31
+    i2 = (py2 if py2 > 0 else 0.0) * Y2 + i_d23 - i_d12
+    i3 = (py3 if py3 > 0 else 0.0) * Y3 + i_d31 - i_d23
+    return i1, i2, i3, i1 + i2 + i3
+
+
+def currents(p_y, p_delta):
+    """(mag1, ang1, mag2, ang2, mag3, ang3, mag_n, ang_n)."""
+    i1, i2, i3, i_n = phasors(p_y, p_delta)
+    return (_abs(i1), _phase(i1), _abs(i2), _phase(i2),
+            _abs(i3), _phase(i3), _abs(i_n), _phase(i_n))
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def currents_cached(p_y, p_delta):
+    """Som currents(), men p_y och p_delta måste vara tupler."""
+    return currents(p_y, p_delta)
+
+
+def currents_batch(p_y, p_delta):
+    """Rader för N scenarier; p_y och p_delta har formen (N, 3).
+
+    Med numpy en (N, 8) float64-array, annars en lista av tupler.
+    """
+    if np is None:
+        return [currents(y, d) for y, d in zip(p_y, p_delta)]
+    p_y = np.clip(np.asarray(p_y, dtype=np.float64).reshape(-1, 3), 0, None)
+    p_delta = np.clip(np.asarray(p_delta, dtype=np.float64).reshape(-1, 3), 0, None)
+    i_y = p_y * np.array((Y1, Y2, Y3))
+    i_d = p_delta * np.array((D12, D23, D31))
+    i_total = i_y + i_d - np.roll(i_d, 1, axis=1)
+    i_n = i_total.sum(axis=1)
+
+    out = np.empty((p_y.shape[0], RESULT_FIELDS))
+    out[:, 0:6:2] = np.abs(i_total)
+    out[:, 1:6:2] = np.angle(i_total)
+    out[:, 6] = np.abs(i_n)
+    out[:, 7] = np.angle(i_n)
+    return out
+
+
+def as_dict(row):
+    """En rad i /calculate-formatet."""
+    return {
+        'line_currents': [{'magnitude': row[0], 'angle': row[1]},
+                          {'magnitude': row[2], 'angle': row[3]},
+                          {'magnitude': row[4], 'angle': row[5]}],
+        'neutral_current': {'magnitude': row[6], 'angle': row[7]},
+    }
@@ -1,18 +1,193 @@
-import hashlib
+import argparse
+import csv
 import datetime
+import functools
+import glob
+import hashlib
+import hmac
+import json
+import os
+import sys
 
-def generate_secret_code(salt="mima_secret_salt", date_str=None):
+DEFAULT_SALT = "mima_secret_salt"
+CODE_LENGTH = 10
+DIGEST_LENGTH = 32 # Hex characters of the HMAC stored per code in the index cache
+INDEX_WINDOW_DAYS = 366 # Default verification window on each side of today
+
+def generate_secret_code(salt=DEFAULT_SALT, date_str=None):
     if date_str is None:
         date_str = datetime.date.today().strftime("%Y-%m-%d")
-    
+
     data = f"{salt}-{date_str}"
-    
+
     # Use SHA256 for a simple, reproducible hash as the "secret code"
     secret_hash = hashlib.sha256(data.encode()).hexdigest()
-    
+
     # Return a portion of the hash to make it "shorter" for a code
-    return secret_hash[:10].upper()
+    return secret_hash[:CODE_LENGTH].upper()
+
+def as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+def generate_codes(start_date, end_date, salt=DEFAULT_SALT):
+    """Yield (date_str, code) for every day from start_date to end_date inclusive.
+
+    Same codes as generate_secret_code in one pass. A salt of at least one
+    SHA-256 block is hashed once and the state copied for each day; a
+    shorter prefix is cheaper to hash again than to copy.
+    """
+    day = as_date(start_date)
+    end = as_date(end_date)
+    prefix_bytes = f"{salt}-".encode()
+    prefix = hashlib.sha256(prefix_bytes)
+    reuse_prefix = len(prefix_bytes) >= prefix.block_size
+    sha256 = hashlib.sha256
+    one_day = datetime.timedelta(days=1)
+    while day <= end:
+        date_str = day.isoformat() # Same as strftime("%Y-%m-%d") for years 1000-9999
+        if reuse_prefix:
+            h = prefix.copy()
+            h.update(date_str.encode())
+        else:
+            h = sha256(prefix_bytes + date_str.encode())
+        yield date_str, h.hexdigest()[:CODE_LENGTH].upper()
+        day += one_day
+
+def default_cache_dir():
+    return os.environ.get("TREFAS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "3fas")
+
+class CodeIndex:
+    """Reverse index code -> date for every day in [start, end].
+
+    Only HMACs of the codes (keyed with the salt) are kept, also in the disk
+    cache, so the cache file neither reveals valid codes nor lets anyone
+    without the salt add their own. The file as a whole carries an HMAC too.
+    """
+    def __init__(self, start_date, end_date, digests, salt=DEFAULT_SALT):
+        self.start = as_date(start_date)
+        self.end = as_date(end_date)
+        self.key = salt.encode()
+        self.digests = digests # One digest per day, in date order
+        # Keep the earliest date if two days ever share a code
+        self.offsets = {}
+        for offset, digest in enumerate(digests):
+            self.offsets.setdefault(digest, offset)
+
+    @staticmethod
+    def code_digest(key, code):
+        return hmac.new(key, code.encode(), hashlib.sha256).hexdigest()[:DIGEST_LENGTH]
+
+    @classmethod
+    def build(cls, start_date, end_date, salt=DEFAULT_SALT):
+        key = salt.encode()
+        digests = [cls.code_digest(key, code) for _, code in generate_codes(start_date, end_date, salt)]
+        return cls(start_date, end_date, digests, salt)
+
+    def lookup(self, code):
+        """Date string for code, or None if it is not valid within the window."""
+        offset = self.offsets.get(self.code_digest(self.key, code.strip().upper()))
+        if offset is None:
+            return None
+        return (self.start + datetime.timedelta(days=offset)).isoformat()
+
+    def file_mac(self, digests):
+        message = f"{self.start}|{self.end}|{','.join(digests)}".encode()
+        return hmac.new(self.key, message, hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def cache_prefix(salt, cache_dir):
+        # The salt is not stored, only a fingerprint of it
+        salt_id = hashlib.sha256(salt.encode()).hexdigest()[:12]
+        return os.path.join(cache_dir, f"codes-{salt_id}-")
+
+    def cache_path(self, salt, cache_dir):
+        return f"{self.cache_prefix(salt, cache_dir)}{self.start}-{self.end}.json"
+
+    def save(self, salt, cache_dir):
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            path = self.cache_path(salt, cache_dir)
+            # Readable by the owner only, whatever the umask
+            fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"start": self.start.isoformat(), "end": self.end.isoformat(),
+                           "digests": self.digests, "mac": self.file_mac(self.digests)}, f)
+            os.replace(path + ".tmp", path)
+            self.prune(salt, cache_dir)
+        except OSError:
+            pass
+
+    def prune(self, salt, cache_dir):
+        """Removes cached windows for the same salt that this one has moved past."""
+        prefix = self.cache_prefix(salt, cache_dir)
+        for path in glob.glob(glob.escape(prefix) + "*.json"):
+            dates = path[len(prefix):-len(".json")]
+            try:
+                start, end = as_date(dates[:10]), as_date(dates[11:])
+            except ValueError:
+                continue
+            if start < self.start and end < self.end:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, start_date, end_date, salt, cache_dir):
+        """The cached index from disk, or None if missing, unreadable or not made with this salt."""
+        index = cls(start_date, end_date, [], salt)
+        try:
+            with open(index.cache_path(salt, cache_dir)) as f:
+                data = json.load(f)
+            digests, mac = data["digests"], data["mac"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if (not isinstance(digests, list) or not all(isinstance(d, str) for d in digests)
+                or len(digests) != (index.end - index.start).days + 1 or not isinstance(mac, str)
+                or not hmac.compare_digest(mac, index.file_mac(digests))):
+            return None
+        return cls(start_date, end_date, digests, salt)
+
+@functools.lru_cache(maxsize=8)
+def code_index(start_date, end_date, salt=DEFAULT_SALT, cache_dir=None):
+    """CodeIndex for the window, from memory, the disk cache or built (and saved)."""
+    cache_dir = cache_dir or default_cache_dir()
+    index = CodeIndex.load(start_date, end_date, salt, cache_dir)
+    if index is None:
+        index = CodeIndex.build(start_date, end_date, salt)
+        index.save(salt, cache_dir)
+    return index
+
+def verify_code(code, salt=DEFAULT_SALT, window_days=INDEX_WINDOW_DAYS, today=None):
+    """Date the code belongs to if it is within window_days of today, else None."""
+    today = as_date(today) if today else datetime.date.today()
+    window = datetime.timedelta(days=window_days)
+    return code_index(today - window, today + window, salt).lookup(code)
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily secret codes")
+    parser.add_argument("--salt", default=DEFAULT_SALT)
+    parser.add_argument("--year", type=int, help="print every code of the year as CSV (date,code)")
+    parser.add_argument("--verify", metavar="CODE", help="print the date of CODE, exit 1 if unknown")
+    parser.add_argument("--window-days", type=int, default=INDEX_WINDOW_DAYS,
+                        help="days before and after today searched by --verify")
+    args = parser.parse_args()
+
+    if args.year is not None:
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(["date", "code"])
+        writer.writerows(generate_codes(datetime.date(args.year, 1, 1), datetime.date(args.year, 12, 31), args.salt))
+    elif args.verify:
+        date_str = verify_code(args.verify, args.salt, args.window_days)
+        if date_str is None:
+            print(f"Unknown code: {args.verify}")
+            sys.exit(1)
+        print(date_str)
+    else:
+        code = generate_secret_code(args.salt)
+        print(f"Your secret code is: {code}")
 
 if __name__ == "__main__":
-    code = generate_secret_code()
-    print(f"Your secret code is: {code}")
\ No newline at end of file
+    main()
@@ -0,0 +1,213 @@
+"""Inspelning och uppspelning av sessioner med main.py.
+
+ThreePhaseSim läser tid och muspekare via en klocka (now()) och en
+inmatningskälla (mouse_pos()). Live är det main.LiveInput; vid uppspelning
+ersätts båda av ReplayInput, så samma kod körs med inspelad inmatning.
+
+Filformat (append-only, little-endian): ett huvud följt av poster.
+Varje bild skrivs som sina händelser (EVENT) följda av en FRAME-post med
+klocktid, muspekare och reglagens värden. Slutar sökvägen på .gz
+komprimeras strömmen med gzip (flera gzip-medlemmar går bra vid append).
+
+    python main.py --record kiosk.rec.gz
+    python session.py kiosk.rec.gz                 # så fort som möjligt, headless
+    python session.py kiosk.rec.gz --realtime      # i inspelad takt, i fönster
+"""
+import argparse
+import gzip
+import os
+import struct
+import sys
+import time
+
+import pygame
+
+MAGIC = b"3FASREC1"
+HEADER = struct.Struct("<8sHHd") # magic, width, height, wall-clock start
+FRAME = struct.Struct("<Bdhh6f") # tag, clock time, mouse x, y, six slider values
+EVENT = struct.Struct("<BBiii") # tag, kind, three integer fields
+TAG_FRAME = 1
+TAG_EVENT = 2
+
+# Recorded event kinds: (pygame type, attributes stored in the integer fields)
+EVENT_KINDS = {
+    1: (pygame.MOUSEBUTTONDOWN, ("pos", "button")),
+    2: (pygame.MOUSEBUTTONUP, ("pos", "button")),
+    3: (pygame.KEYDOWN, ("key",)),
+    4: (pygame.VIDEORESIZE, ("size",)),
+    5: (pygame.QUIT, ()),
+    6: (pygame.FINGERDOWN, ("finger_id", "x", "y")),
+    7: (pygame.FINGERMOTION, ("finger_id", "x", "y")),
+    8: (pygame.FINGERUP, ("finger_id", "x", "y")),
+}
+KIND_OF_TYPE = {pg_type: kind for kind, (pg_type, _) in EVENT_KINDS.items()}
+FINGER_SCALE = 1_000_000 # Finger x, y (0..1) are stored as integer millionths
+
+
+def open_stream(path, mode):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class SessionRecorder:
+    def __init__(self, path, width, height):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.stream = open_stream(path, "ab")
+        if new_file:
+            self.stream.write(HEADER.pack(MAGIC, width, height, time.time()))
+        self.frames = 0
+
+    def event_record(self, event):
+        kind = KIND_OF_TYPE.get(event.type)
+        # Mouse events SDL synthesizes from touches are ignored live; the finger events are recorded
+        if kind is None or getattr(event, "touch", False):
+            return None
+        fields = []
+        for attr in EVENT_KINDS[kind][1]:
+            value = getattr(event, attr)
+            if attr in ("x", "y"):
+                value = round(value * FINGER_SCALE)
+            fields.extend(value if isinstance(value, tuple) else (value,))
+        fields += [0] * (3 - len(fields))
+        return EVENT.pack(TAG_EVENT, kind, *fields)
+
+    def record_frame(self, clock_time, mouse, events, slider_values):
+        records = [r for r in map(self.event_record, events) if r is not None]
+        records.append(FRAME.pack(TAG_FRAME, clock_time, mouse[0], mouse[1], *slider_values))
+        self.stream.write(b"".join(records))
+        self.frames += 1
+
+    def close(self):
+        self.stream.close()
+
+
+def make_event(kind, a, b, c):
+    pg_type, attrs = EVENT_KINDS[kind]
+    values = iter((a, b, c))
+    fields = {}
+    for attr in attrs:
+        if attr in ("pos", "size"):
+            fields[attr] = (next(values), next(values))
+        elif attr in ("x", "y"):
+            fields[attr] = next(values) / FINGER_SCALE
+        else:
+            fields[attr] = next(values)
+    if pg_type == pygame.VIDEORESIZE:
+        fields["w"], fields["h"] = fields["size"]
+    return pygame.event.Event(pg_type, fields)
+
+
+def read_session(path):
+    """(huvud, generator över bilder (tid, mus, händelser, reglagevärden))."""
+    stream = open_stream(path, "rb")
+    magic, width, height, start = HEADER.unpack(stream.read(HEADER.size))
+    if magic != MAGIC:
+        stream.close()
+        raise ValueError(f"{path} is not a session recording")
+
+    def frames():
+        with stream:
+            events = []
+            while True:
+                tag = stream.read(1)
+                if not tag:
+                    return
+                if tag[0] == TAG_EVENT:
+                    _, kind, a, b, c = EVENT.unpack(tag + stream.read(EVENT.size - 1))
+                    events.append(make_event(kind, a, b, c))
+                elif tag[0] == TAG_FRAME:
+                    record = FRAME.unpack(tag + stream.read(FRAME.size - 1))
+                    yield record[1], (record[2], record[3]), events, record[4:]
+                    events = []
+                else:
+                    raise ValueError(f"{path}: unknown record tag {tag[0]}")
+
+    return (width, height, start), frames()
+
+
+class ReplayInput:
+    """Klocka och muspekare från den inspelade bilden som spelas upp."""
+    def __init__(self):
+        self.time = 0.0
+        self.mouse = (0, 0)
+
+    def now(self):
+        return self.time
+
+    def mouse_pos(self):
+        return self.mouse
+
+
+def replay(path, realtime=False, profile_dump=None):
+    """Spelar upp en inspelning och returnerar en sammanfattning.
+
+    Headless och utan väntan om inte realtime; då visas ett fönster och
+    bilderna kommer i inspelad takt.
+    """
+    import main as sim_main
+
+    (width, height, _), frames = read_session(path)
+    if realtime:
+        pygame.init()
+        screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+    else:
+        screen = sim_main.init_headless(width, height)
+    source = ReplayInput()
+    profiler = sim_main.FrameProfiler(enabled=True)
+    sim = sim_main.ThreePhaseSim(width, height, profiler, clock=source, input_source=source)
+    renderer = sim_main.LayeredRenderer(sim)
+
+    count = mismatches = 0
+    first_time = last_time = None
+    wall_start = time.perf_counter()
+    for clock_time, mouse, events, slider_values in frames:
+        if first_time is None:
+            first_time = sim.last_update_time = clock_time
+        last_time = clock_time
+        source.time, source.mouse = clock_time, mouse
+        if realtime:
+            delay = (clock_time - first_time) - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+            pygame.event.pump()
+        profiler.start_frame()
+        for event in events:
+            if event.type == pygame.VIDEORESIZE:
+                if realtime:
+                    screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                else:
+                    screen = pygame.Surface(event.size)
+                renderer.invalidate()
+        sim.update(events)
+        dirty = renderer.render(screen)
+        if realtime and dirty:
+            pygame.display.update(dirty)
+        profiler.end_frame()
+        # The recording holds the slider values the live session ended the frame with
+        values = [s.val for s in sim.sliders_delta + sim.sliders_y]
+        if any(abs(v - r) > 1e-3 for v, r in zip(values, slider_values)):
+            mismatches += 1
+        count += 1
+
+    wall = time.perf_counter() - wall_start
+    if profile_dump:
+        profiler.dump(profile_dump)
+    session = (last_time - first_time) if count else 0.0
+    return {"frames": count, "session_s": session, "replay_s": wall,
+            "speedup": session / wall if wall > 0 else 0.0, "slider_mismatches": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded pace in a window")
+    parser.add_argument("--profile-dump", metavar="PATH", help="frame statistics (.json or .csv)")
+    args = parser.parse_args()
+    result = replay(args.recording, args.realtime, args.profile_dump)
+    print(f"{result['frames']} frames, {result['session_s']:.1f} s session replayed in {result['replay_s']:.2f} s "
+          f"({result['speedup']:.0f}x), slider mismatches: {result['slider_mismatches']}")
+    sys.exit(1 if result["slider_mismatches"] else 0)
+
+
+if __name__ == "__main__":
+    main()
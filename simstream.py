@@ -0,0 +1,168 @@
+"""Samplade tidsserier av linje- och neutralströmmar, i block.
+
+Ett lastschema är en lista av ändringar {"t": s, "p_y": [3], "p_delta": [3]};
+varje ändring gäller tills nästa (före den första är allt 0 W). simulate()
+är en generator som ger Chunk-block om chunk_size sampel, så även långa
+körningar tar konstant minne. Momentanvärdena är i(t) = √2·|I|·cos(ωt + φ).
+
+    python simstream.py schedule.json --rate 10000 --duration 60 --format float32 > currents.f32
+
+Varje binärt block är little-endian float32-rader (t, iL1, iL2, iL3, iN).
+I NDJSON är varje rad ett block med kolumnerna som listor.
+"""
+import argparse
+import json
+import math
+import sys
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError: # Plain loops without numpy
+    np = None
+
+import physics
+
+FREQUENCY = 50.0
+CHUNK_SIZE = 4096
+COLUMNS = ("t", "l1", "l2", "l3", "n")
+
+Chunk = namedtuple("Chunk", "start columns")
+Chunk.__doc__ = """Första samplets index och kolumnerna (t, iL1, iL2, iL3, iN) som sekvenser."""
+
+
+def parse_schedule(entries):
+    """Validerar ett lastschema och returnerar [(t, p_y, p_delta)] sorterat på t."""
+    schedule = []
+    for entry in entries:
+        t = float(entry.get("t", 0.0))
+        p_y = tuple(max(float(p), 0.0) for p in entry.get("p_y", (0.0, 0.0, 0.0)))
+        p_delta = tuple(max(float(p), 0.0) for p in entry.get("p_delta", (0.0, 0.0, 0.0)))
+        if len(p_y) != 3 or len(p_delta) != 3:
+            raise ValueError("p_y and p_delta need three values each")
+        if not math.isfinite(t) or t < 0:
+            raise ValueError("t must be a non-negative number")
+        schedule.append((t, p_y, p_delta))
+    schedule.sort(key=lambda e: e[0])
+    return schedule
+
+
+def schedule_segments(schedule, sample_rate, voltage_rms=physics.VOLTAGE_RMS):
+    """[(första sampel, toppvärdesvisare (L1, L2, L3, N))] för varje ändring.
+
+    Effekterna gäller vid voltage_rms; strömmarna kommer från physics.phasors.
+    """
+    # physics.phasors gives P / VOLTAGE_RMS; the same power at another voltage scales as 1/V
+    scale = math.sqrt(2) * physics.VOLTAGE_RMS / voltage_rms
+    segments = [(0, (0j, 0j, 0j, 0j))]
+    for t, p_y, p_delta in schedule:
+        peaks = tuple(scale * i for i in physics.phasors(p_y, p_delta))
+        first = math.ceil(t * sample_rate)
+        if first <= segments[-1][0]:
+            segments[-1] = (segments[-1][0], peaks) # Same sample as the previous change
+        else:
+            segments.append((first, peaks))
+    return segments
+
+
+def sample_block(start, stop, sample_rate, omega, peaks):
+    """Kolumner för samplen start..stop-1 med fasta visare."""
+    if np is not None:
+        t = np.arange(start, stop) / sample_rate
+        rotation = np.exp(1j * omega * t)
+        return [t] + [(p * rotation).real for p in peaks]
+    t = [n / sample_rate for n in range(start, stop)]
+    columns = [t]
+    for p in peaks:
+        mag, phase = abs(p), math.atan2(p.imag, p.real)
+        columns.append([mag * math.cos(omega * x + phase) for x in t])
+    return columns
+
+
+def simulate(schedule, sample_rate, duration, chunk_size=CHUNK_SIZE, frequency=FREQUENCY,
+             voltage_rms=physics.VOLTAGE_RMS):
+    """Generator över Chunk-block för schemat (från parse_schedule).
+
+    Parametrarna kontrolleras direkt (ValueError), inte först när strömmen läses.
+    """
+    if not all(map(math.isfinite, (sample_rate, duration, frequency))):
+        raise ValueError("sample_rate, duration and frequency must be finite")
+    if sample_rate <= 0 or chunk_size <= 0 or duration < 0:
+        raise ValueError("sample_rate and chunk_size must be positive, duration non-negative")
+    return generate_chunks(schedule, sample_rate, duration, chunk_size, frequency, voltage_rms)
+
+
+def generate_chunks(schedule, sample_rate, duration, chunk_size, frequency, voltage_rms):
+    total = int(round(duration * sample_rate))
+    omega = 2 * math.pi * frequency
+    segments = schedule_segments(schedule, sample_rate, voltage_rms)
+    seg = 0
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        parts = []
+        n = start
+        while n < stop:
+            while seg + 1 < len(segments) and segments[seg + 1][0] <= n:
+                seg += 1
+            seg_stop = segments[seg + 1][0] if seg + 1 < len(segments) else stop
+            part_stop = min(stop, seg_stop)
+            parts.append(sample_block(n, part_stop, sample_rate, omega, segments[seg][1]))
+            n = part_stop
+        if len(parts) == 1:
+            columns = parts[0]
+        elif np is not None:
+            columns = [np.concatenate(cols) for cols in zip(*parts)]
+        else:
+            columns = [[x for col in cols for x in col] for cols in zip(*parts)]
+        yield Chunk(start, columns)
+
+
+def chunk_bytes(chunk):
+    """Blocket som little-endian float32-rader (t, iL1, iL2, iL3, iN)."""
+    if np is not None:
+        return np.column_stack(chunk.columns).astype("<f4").tobytes()
+    values = array("f", (x for row in zip(*chunk.columns) for x in row))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def chunk_json(chunk):
+    """Blocket som en NDJSON-rad."""
+    columns = [c.tolist() if np is not None else c for c in chunk.columns]
+    line = {"start": chunk.start}
+    line.update(zip(COLUMNS, columns))
+    return json.dumps(line) + "\n"
+
+
+def encode(chunks, fmt="ndjson"):
+    """Kodar blocken som NDJSON-rader (str) eller float32-block (bytes)."""
+    encoder = chunk_bytes if fmt == "float32" else chunk_json
+    for chunk in chunks:
+        yield encoder(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("schedule", help='JSON file with [{"t": s, "p_y": [3], "p_delta": [3]}, ...]')
+    parser.add_argument("--rate", type=float, default=10000.0, help="samples per second")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--frequency", type=float, default=FREQUENCY)
+    parser.add_argument("--format", choices=("ndjson", "float32"), default="ndjson")
+    args = parser.parse_args()
+
+    with open(args.schedule) as f:
+        schedule = parse_schedule(json.load(f))
+    try:
+        chunks = simulate(schedule, args.rate, args.duration, args.chunk_size, args.frequency)
+    except ValueError as e:
+        parser.error(str(e))
+    out = sys.stdout.buffer if args.format == "float32" else sys.stdout
+    for block in encode(chunks, args.format):
+        out.write(block)
+
+
+if __name__ == "__main__":
+    main()
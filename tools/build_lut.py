@@ -0,0 +1,37 @@
+"""Förberäknar driftpunktstabellen som main.py och flask_app/app.py läser.
+
+    python tools/build_lut.py [--y-step 500] [--delta-step 500] [-o operating_points.lut]
+
+Hela 10 W-rutnätet (201^3 * 301^3 punkter) får inte plats i en fil, så
+tabellen byggs för ett grövre delrutnät; övriga punkter räknas live.
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import oplut  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=os.path.join(ROOT, oplut.DEFAULT_PATH))
+    parser.add_argument("--y-max", type=float, default=2000.0)
+    parser.add_argument("--y-step", type=float, default=500.0)
+    parser.add_argument("--delta-max", type=float, default=3000.0)
+    parser.add_argument("--delta-step", type=float, default=500.0)
+    args = parser.parse_args()
+
+    count = oplut.grid_size(args.y_max, args.y_step, args.delta_max, args.delta_step)
+    size = oplut.HEADER.size + oplut.FIELDS * 4 * count
+    print(f"{count:,} points, {size / 1e6:,.1f} MB")
+    start = time.perf_counter()
+    oplut.write_table(args.output, args.y_max, args.y_step, args.delta_max, args.delta_step)
+    print(f"wrote {args.output} in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Bygger webbversionen (pygbag) till en katalog som kan läggas ut som den är.
+
+    python tools/build_web.py [-o build/web] [--page index.html]
+
+Katalogen får index.html, favicon.png och 3fas.apk (samma upplägg som
+3fas.apk i repots rot: filerna under assets/). Jämfört med en apk av
+hela katalogen:
+
+- Bara de moduler main.py faktiskt importerar packas, inte flask_app,
+  verktyg, gamla apk-filer m.m. Pythons standardbibliotek hämtas av
+  pygbag-körmiljön från CDN:en och ligger aldrig i apk:n; de moduler
+  paketet använder listas i rapporten.
+- 3fas.jpg ersätts av förskalade, JPEG-komprimerade hinkar och ett
+  manifest (3fas.buckets.json) som AssetCache väljer från, så första
+  bilden slipper avkoda och skala originalet.
+- Sidan får en liten platshållarbild av första bilden inbäddad som
+  bakgrund, så något syns direkt medan körmiljön och apk:n laddas.
+
+En rapport med storlekar skrivs till web-build.json i katalogen.
+"""
+import argparse
+import ast
+import base64
+import json
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+ENTRY = "main.py"
+IMAGE = "3fas.jpg"
+PAGE_FILES = ("favicon.png",)
+DATA_FILES = ("operating_points.lut",) # Packed when present
+# Widths the layout asks for at 1200x800 (the page canvas), 1920x1080 and 2560x1440;
+# larger windows scale up from the largest
+BUCKET_WIDTHS = (480, 640, 960)
+POSTER_SIZE = (1200, 800) # Window size main.py opens with
+POSTER_WIDTH = 480
+REPORT = "web-build.json"
+# Modules main.py imports only when needed: module -> data file that needs it (None: never on the web)
+CONDITIONAL_MODULES = {"session": None, "oplut": "operating_points.lut"}
+# Anchors in the pygbag page
+BODY_BACKGROUND = 'platform.document.body.style.background = "#7f7f7f"'
+STYLE_END = "</style>"
+
+
+def module_closure(entry=ENTRY, skip=()):
+    """(lokala modulfiler, externa toppmoduler) som entry importerar, även i funktioner och try.
+
+    Moduler i skip och det bara de importerar följs inte.
+    """
+    local, external = [], set()
+    pending = [entry]
+    while pending:
+        name = pending.pop()
+        if name in local:
+            continue
+        local.append(name)
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                top = module.split(".")[0]
+                if top in skip:
+                    continue
+                if os.path.exists(os.path.join(ROOT, top + ".py")):
+                    pending.append(top + ".py")
+                else:
+                    external.add(top)
+    return sorted(local), external
+
+
+def write_buckets(source_path, out_dir):
+    """Skalar bilden till BUCKET_WIDTHS (mindre än originalet) och skriver manifestet."""
+    import pygame
+
+    image = pygame.image.load(source_path)
+    img_w, img_h = image.get_size()
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    buckets = []
+    for width in BUCKET_WIDTHS:
+        if width >= img_w:
+            break
+        size = (width, round(img_h * width / img_w))
+        name = f"{stem}.{width}.jpg"
+        pygame.image.save(pygame.transform.smoothscale(image, size), os.path.join(out_dir, name))
+        buckets.append([size[0], size[1], name])
+    if len(buckets) < len(BUCKET_WIDTHS):
+        # The window is wider than every bucket: keep the original as the largest
+        shutil.copyfile(source_path, os.path.join(out_dir, os.path.basename(source_path)))
+        buckets.append([img_w, img_h, os.path.basename(source_path)])
+    from assets import PRESCALED_SUFFIX
+    with open(os.path.join(out_dir, stem + PRESCALED_SUFFIX), "w") as f:
+        json.dump({"source": os.path.basename(source_path), "size": [img_w, img_h], "buckets": buckets}, f)
+    return [name for _, _, name in buckets] + [stem + PRESCALED_SUFFIX]
+
+
+def render_poster(width=POSTER_WIDTH):
+    """Första bilden i main.py (inga laster), nedskalad och JPEG-kodad, som data-URI."""
+    import pygame
+    import main as sim_main
+    from assets import AssetCache
+
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        screen = sim_main.init_headless(*POSTER_SIZE)
+        sim = sim_main.ThreePhaseSim(*POSTER_SIZE, assets=AssetCache(tmp))
+        sim.update([])
+        sim_main.LayeredRenderer(sim).render(screen)
+        height = round(POSTER_SIZE[1] * width / POSTER_SIZE[0])
+        path = os.path.join(tmp, "poster.jpg")
+        pygame.image.save(pygame.transform.smoothscale(screen, (width, height)), path)
+        with open(path, "rb") as f:
+            data = f.read()
+    return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii"), sim_main.COLOR_BG
+
+
+def inject_poster(page, poster_uri, background):
+    """Sidan med platshållaren som bakgrund tills spelets första bild täcker den."""
+    if BODY_BACKGROUND not in page or STYLE_END not in page:
+        raise ValueError("page does not look like a pygbag page (anchors not found)")
+    color = "#%02x%02x%02x" % tuple(background)
+    # pygbag clears the body background on start; keep the poster and only set the colour
+    page = page.replace(BODY_BACKGROUND, f'platform.document.body.style.backgroundColor = "{color}"', 1)
+    rule = f"        body {{ background: {color} url({poster_uri}) center / contain no-repeat; }}\n    "
+    return page.replace(STYLE_END, rule + STYLE_END, 1)
+
+
+def write_apk(paths, apk_path):
+    """Zip med filerna under assets/. Även JPEG-filerna krymper med deflate (linjeritning)."""
+    with zipfile.ZipFile(apk_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as apk:
+        for path in sorted(paths):
+            apk.write(path, f"assets/{os.path.basename(path)}")
+
+
+def build(out_dir, page_path):
+    if os.path.isdir(out_dir) and os.listdir(out_dir) and not os.path.exists(os.path.join(out_dir, REPORT)):
+        raise SystemExit(f"{out_dir} is not empty and not an earlier web build; refusing to overwrite")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+
+    skip = {m for m, data in CONDITIONAL_MODULES.items() if data is None or not os.path.exists(os.path.join(ROOT, data))}
+    modules, external = module_closure(skip=skip)
+    packed = [os.path.join(ROOT, n) for n in modules + list(DATA_FILES) if os.path.exists(os.path.join(ROOT, n))]
+    with tempfile.TemporaryDirectory() as stage:
+        # The same code with the full-size image, for comparison
+        write_apk(packed + [os.path.join(ROOT, IMAGE)], os.path.join(stage, "full.apk"))
+        full_apk_bytes = os.path.getsize(os.path.join(stage, "full.apk"))
+        os.remove(os.path.join(stage, "full.apk"))
+        write_buckets(os.path.join(ROOT, IMAGE), stage)
+        packed += [os.path.join(stage, name) for name in os.listdir(stage)]
+        files = {os.path.basename(p): os.path.getsize(p) for p in sorted(packed, key=os.path.basename)}
+        write_apk(packed, os.path.join(out_dir, "3fas.apk"))
+
+    poster_uri, background = render_poster()
+    with open(page_path, encoding="utf-8") as f:
+        page = inject_poster(f.read(), poster_uri, background)
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(page)
+    for name in PAGE_FILES:
+        shutil.copyfile(os.path.join(ROOT, name), os.path.join(out_dir, name))
+
+    baseline = os.path.join(ROOT, "3fas.apk")
+    report = {
+        "apk_bytes": os.path.getsize(os.path.join(out_dir, "3fas.apk")),
+        "full_image_apk_bytes": full_apk_bytes,
+        "deployed_apk_bytes": os.path.getsize(baseline) if os.path.exists(baseline) else None,
+        "page_bytes": len(page.encode("utf-8")),
+        "poster_bytes": len(poster_uri),
+        "files": files,
+        "stdlib_modules": sorted(external & sys.stdlib_module_names),
+        "third_party_modules": sorted(external - sys.stdlib_module_names),
+    }
+    with open(os.path.join(out_dir, REPORT), "w") as f:
+        json.dump(report, f, indent=1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=os.path.join(ROOT, "build", "web"))
+    parser.add_argument("--page", default=os.path.join(ROOT, "index.html"), help="built pygbag page to start from")
+    args = parser.parse_args()
+
+    report = build(os.path.abspath(args.output), args.page)
+    for name, size in report["files"].items():
+        print(f"  {name:<28} {size / 1024:>8.1f} KB")
+    deployed = report["deployed_apk_bytes"]
+    print(f"3fas.apk {report['apk_bytes'] / 1024:.1f} KB, {report['full_image_apk_bytes'] / 1024:.1f} KB with {IMAGE}"
+          + (f", deployed 3fas.apk {deployed / 1024:.1f} KB" if deployed else ""))
+    print(f"index.html {report['page_bytes'] / 1024:.1f} KB incl. {report['poster_bytes'] / 1024:.1f} KB poster")
+    print("stdlib used (from the pygbag runtime): " + ", ".join(report["stdlib_modules"]))
+    print("third-party imports: " + ", ".join(report["third_party_modules"]))
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Jämför physics.js (körs i Node) med calculate_currents i flask_app/app.py.
+
+    python tools/check_js_parity.py [--scenarios N]
+
+Kräver node i PATH men ingen webbläsare. Avslutas med status 1 vid avvikelse.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PHYSICS_JS = os.path.join(ROOT, "flask_app", "static", "js", "physics.js")
+sys.path.insert(0, os.path.join(ROOT, "flask_app"))
+
+from app import calculate_currents  # noqa: E402
+
+NODE_SCRIPT = """
+const physics = require(process.argv[1]);
+let input = '';
+process.stdin.on('data', (chunk) => { input += chunk; });
+process.stdin.on('end', () => {
+    const scenarios = JSON.parse(input);
+    const out = scenarios.map(([pY, pDelta]) => physics.calculateCurrents(pY, pDelta));
+    process.stdout.write(JSON.stringify(out));
+});
+"""
+TOLERANCE = 1e-9
+
+
+def scenarios(n, seed=1):
+    rng = random.Random(seed)
+    cases = [([0, 0, 0], [0, 0, 0]), ([2000, 2000, 2000], [0, 0, 0]),
+             ([0, 0, 0], [3000, 3000, 3000]), ([-100, 500, 0], [0, -10, 1200])]
+    for _ in range(n):
+        cases.append(([rng.randrange(0, 2001, 10) for _ in range(3)],
+                      [rng.randrange(0, 3001, 10) for _ in range(3)]))
+    return cases
+
+
+def compare(expected, actual):
+    pairs = zip(expected['line_currents'] + [expected['neutral_current']],
+                actual['line_currents'] + [actual['neutral_current']])
+    for e, a in pairs:
+        if abs(e['magnitude'] - a['magnitude']) > TOLERANCE:
+            return False
+        # The angle of a (numerically) zero phasor is meaningless, and -pi == pi
+        d_angle = abs(math.remainder(e['angle'] - a['angle'], 2 * math.pi))
+        if e['magnitude'] > 1e-9 and d_angle > TOLERANCE:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenarios", type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = scenarios(args.scenarios)
+    proc = subprocess.run(["node", "-e", NODE_SCRIPT, PHYSICS_JS], input=json.dumps(cases),
+                          capture_output=True, text=True, check=True)
+    results = json.loads(proc.stdout)
+
+    failures = [(c, r) for c, r in zip(cases, results) if not compare(calculate_currents(*c), r)]
+    for (p_y, p_delta), _ in failures[:10]:
+        print(f"MISMATCH p_y={p_y} p_delta={p_delta}")
+    print(f"{len(cases) - len(failures)}/{len(cases)} scenarios match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
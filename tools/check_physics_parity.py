@@ -0,0 +1,163 @@
+"""Jämför alla ingångar till strömberäkningen med en fristående referens.
+
+Kontrollerar physics.currents, currents_cached, currents_batch (med och
+utan numpy), loadnet, simstream, calculate_currents i flask_app/app.py, ThreePhaseSim
+i main.py (om pygame finns) och driftpunktstabellen (oplut, float32).
+
+    python tools/check_physics_parity.py [--scenarios N]
+
+Avslutas med status 1 vid avvikelse.
+"""
+import argparse
+import cmath
+import math
+import os
+import random
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "flask_app"))
+
+import loadnet  # noqa: E402
+import oplut  # noqa: E402
+import physics  # noqa: E402
+import simstream  # noqa: E402
+from app import calculate_currents  # noqa: E402
+
+TOLERANCE = 1e-9
+TABLE_TOLERANCE = 1e-4 # float32 storage
+TABLE_STEP = 500
+
+
+def reference(p_y, p_delta):
+    """Lärobokens formel, medvetet utan något från physics.py."""
+    v = 230.0
+    u_phase = [cmath.rect(1, -2 * math.pi / 3 * k) for k in range(3)]
+    u_line = [cmath.rect(1, math.pi / 6 - 2 * math.pi / 3 * k) for k in range(3)]
+    i_y = [max(p, 0) / v * u for p, u in zip(p_y, u_phase)]
+    i_d = [max(p, 0) / (v * math.sqrt(3)) * u for p, u in zip(p_delta, u_line)]
+    lines = [i_y[k] + i_d[k] - i_d[k - 1] for k in range(3)]
+    return lines + [sum(lines)]
+
+
+def to_phasors(row):
+    return [cmath.rect(row[2 * k], row[2 * k + 1]) for k in range(4)]
+
+
+def from_dict(result):
+    return [cmath.rect(c['magnitude'], c['angle'])
+            for c in result['line_currents'] + [result['neutral_current']]]
+
+
+def via_loadnet_network(p_y, p_delta):
+    net = loadnet.LoadNetwork(physics.VOLTAGE_RMS)
+    for k in range(3):
+        if p_y[k] > 0:
+            net.add_load(loadnet.Y, k, power=p_y[k])
+        if p_delta[k] > 0:
+            net.add_load(loadnet.DELTA, k, power=p_delta[k])
+    solution = net.solve()
+    return list(solution.line_currents) + [solution.neutral_current]
+
+
+def via_simstream(p_y, p_delta):
+    # One change at t=0 replaces the initial zero segment; peaks back to RMS
+    peaks = simstream.schedule_segments([(0.0, p_y, p_delta)], 1.0)[0][1]
+    return [p / math.sqrt(2) for p in peaks]
+
+
+def scenarios(n, seed=1):
+    rng = random.Random(seed)
+    cases = [((0, 0, 0), (0, 0, 0)), ((2000, 2000, 2000), (0, 0, 0)),
+             ((0, 0, 0), (3000, 3000, 3000)), ((-100, 500, 0), (0, -10, 1200))]
+    for _ in range(n):
+        cases.append((tuple(rng.randrange(0, 2001, 10) for _ in range(3)),
+                      tuple(rng.randrange(0, 3001, 10) for _ in range(3))))
+    return cases
+
+
+def sim_function():
+    """ThreePhaseSim.calculate_currents i ampere, eller None utan pygame."""
+    try:
+        import main
+    except ImportError:
+        return None
+    sim = main.ThreePhaseSim(*main.init_headless(800, 600).get_size())
+    sim.op_table = None
+
+    def currents(p_y, p_delta):
+        for slider, p in zip(sim.sliders_y + sim.sliders_delta, p_y + p_delta):
+            slider.val = max(p, 0)
+        sim.calculate_currents()
+        ppa = sim.pixels_per_amp
+        data = sim.line_currents_data + [sim.neutral_current_data]
+        return [cmath.rect(mag / ppa, angle) for mag, angle in data]
+
+    return currents
+
+
+def max_error(expected, actual):
+    return max(abs(e - a) for e, a in zip(expected, actual))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = scenarios(args.scenarios)
+    p_y = [c[0] for c in cases]
+    p_delta = [c[1] for c in cases]
+    expected = [reference(*c) for c in cases]
+
+    batch = [to_phasors(row) for row in physics.currents_batch(p_y, p_delta)]
+    numpy_module = physics.np
+    physics.np = None
+    try:
+        batch_plain = [to_phasors(row) for row in physics.currents_batch(p_y, p_delta)]
+    finally:
+        physics.np = numpy_module
+
+    results = {
+        "physics.currents": [to_phasors(physics.currents(*c)) for c in cases],
+        "physics.currents_cached": [to_phasors(physics.currents_cached(*c)) for c in cases],
+        "physics.currents_batch": batch,
+        "currents_batch (no numpy)": batch_plain,
+        "simstream.schedule_segments": [via_simstream(*c) for c in cases],
+        "loadnet.LoadNetwork": [via_loadnet_network(*c) for c in cases],
+        "app.calculate_currents": [from_dict(calculate_currents(*c)) for c in cases],
+    }
+    sim = sim_function()
+    if sim is not None:
+        results["main.ThreePhaseSim"] = [sim(*c) for c in cases]
+    else:
+        print("main.ThreePhaseSim skipped (pygame missing)")
+
+    failed = False
+    for name, rows in results.items():
+        worst = max(max_error(e, a) for e, a in zip(expected, rows))
+        ok = worst <= TOLERANCE
+        failed |= not ok
+        print(f"{name:<28} max error {worst:.2e} A  {'ok' if ok else 'MISMATCH'}")
+
+    if physics.np is not None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "parity.lut")
+            oplut.write_table(path, y_step=TABLE_STEP, delta_step=TABLE_STEP)
+            table = oplut.OperatingPointTable(path)
+            on_grid = [c for c in cases if all(p >= 0 and p % TABLE_STEP == 0 for p in c[0] + c[1])]
+            on_grid += [(tuple(p // 100 * 100 // TABLE_STEP * TABLE_STEP for p in c[0]),
+                         tuple(p // 100 * 100 // TABLE_STEP * TABLE_STEP for p in c[1])) for c in cases[4:1000]]
+            worst = max(max_error(reference(*c), to_phasors(table.lookup(*c))) for c in on_grid)
+            ok = worst <= TABLE_TOLERANCE
+            failed |= not ok
+            print(f"{'oplut table (float32)':<28} max error {worst:.2e} A  {'ok' if ok else 'MISMATCH'}")
+            del table
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()